@@ -1,8 +1,9 @@
 from django.conf import settings
-from django.core.mail import send_mail
 from rest_framework.generics import CreateAPIView
 from rest_framework.permissions import AllowAny
 
+from utils.mail_logic import outbox
+
 from .models import ContactMessage
 from .serializers import ContactMessageSerializer
 
@@ -14,9 +15,10 @@ class ContactMessageCreateView(CreateAPIView):
 
     def perform_create(self, serializer):
         contact = serializer.save()
-        send_mail(
+        # Every message is worth a notification: no dedupe
+        outbox.enqueue(
+            to=settings.CONTACT_NOTIFICATION_EMAIL,
             subject=f"New Contact Message: {contact.subject}",
-            message=f"From: {contact.name}\nEmail: {contact.email}\n\n{contact.message}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[settings.CONTACT_NOTIFICATION_EMAIL],
+            body=f"From: {contact.name}\nEmail: {contact.email}\n\n{contact.message}",
+            dedupe=False,
         )
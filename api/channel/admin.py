@@ -3,4 +3,14 @@ from django.contrib import admin
 from . import models
 
 # Register your models here.
-admin.site.register([models.Channel, models.Exam])
+admin.site.register(
+    [
+        models.Channel,
+        models.Exam,
+        models.Attachment,
+        models.Blob,
+        models.DocumentChunk,
+        models.DocumentIndexJob,
+        models.SearchEntry,
+    ]
+)
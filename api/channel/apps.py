@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class OpenaiContentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api.channel"
+
+    def ready(self):
+        from utils.db_logic import connection_stats  # noqa: F401
+
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(signals.create_search_index, sender=self)
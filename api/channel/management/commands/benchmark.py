@@ -0,0 +1,273 @@
+import io
+import json
+import statistics
+import timeit
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.channel.serializers import GenerateExamSerializer
+from utils.file_logic import file_loader
+from utils.json_logic.fast_json import (
+    FastJSONDecoder,
+    FastJSONEncoder,
+    FastJSONParser,
+    FastJSONRenderer,
+)
+from utils.openai_logic import image_analyze, prompt_cache, token_calculation
+
+SIZES = [10, 100, 1_000, 10_000]
+
+EXAM_PAYLOAD = {
+    "exam": "gate",
+    "subject": "Data Science and Artificial Intelligence (DA)",
+    "difficulty": "medium",
+    "language": "english",
+    "mode": "mcq",
+    "count": 10,
+}
+
+
+def _conversation(size):
+    """A stored Channel.context of `size` messages with attachments every 10 turns."""
+    conversation = [{"role": "system", "content": prompt_cache.SYSTEM_PROMPT}]
+    for i in range(size - 1):
+        if i % 10 == 9:
+            conversation.append(
+                {
+                    "role": "system",
+                    "content": "This is the information that I have extracted from "
+                    "the document that user shared:\n\n" + "lorem ipsum " * 500,
+                }
+            )
+        elif i % 2 == 0:
+            conversation.append(
+                {"role": "user", "content": f"Question {i}", "files": [f"doc{i}.pdf"]}
+            )
+        else:
+            conversation.append({"role": "assistant", "content": "lorem ipsum " * 50})
+    return conversation
+
+
+def _exam_questions(count):
+    """Exam.questions_answers as generate_exam returns it for MCQ mode."""
+    return [
+        {
+            "question": f"Question {i}: " + "lorem ipsum dolor sit amet " * 4,
+            "options": {str(n): f"Option {n} " + "lorem " * 5 for n in range(1, 5)},
+            "correct_option": "2",
+            "explanation": "Because " + "lorem ipsum " * 20,
+        }
+        for i in range(count)
+    ]
+
+
+def _sample_pdf(pages=5):
+    """Build a small text PDF (one line of text per page) without extra dependencies."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None]
+    kids = []
+    for page in range(pages):
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        kids.append(f"{page_id} 0 R")
+        stream = f"BT /F1 12 Tf 72 720 Td (Page {page} lorem ipsum dolor sit) Tj ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Contents {content_id} 0 R /Resources << /Font << /F1 "
+            f"{pages * 2 + 3} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode())
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n".encode()
+    )
+    return out.getvalue()
+
+
+def _sample_docx(paragraphs=50):
+    """Build a minimal DOCX with `paragraphs` paragraphs."""
+    body = "".join(
+        f"<w:p><w:r><w:t>Paragraph {i} lorem ipsum dolor sit amet</w:t></w:r></w:p>"
+        for i in range(paragraphs)
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as docx:
+        docx.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            "</Types>",
+        )
+        docx.writestr(
+            "_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+            "</Relationships>",
+        )
+        docx.writestr(
+            "word/document.xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{body}</w:body></w:document>",
+        )
+    return out.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark the per-request hot functions over conversation sizes "
+        "from 10 to 10,000 messages. --baseline fails on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=SIZES,
+            help="Conversation sizes (messages) to benchmark",
+        )
+        parser.add_argument(
+            "--filter", help="Only run benchmarks whose name contains this text"
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument(
+            "--baseline", help="JSON report of a previous run to gate regressions"
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=0.20,
+            help="Allowed relative slowdown against --baseline (default: 0.20)",
+        )
+
+    def benchmarks(self, sizes):
+        """Yield (name, callable) pairs; setup happens here, outside the timings."""
+        for size in sizes:
+            conversation = _conversation(size)
+            payload = json.dumps(conversation)
+            yield (
+                f"build_model_input[{size}]",
+                lambda c=conversation: prompt_cache.build_model_input(c, "next?"),
+            )
+            yield f"context_json_dumps[{size}]", lambda c=conversation: json.dumps(c)
+            yield f"context_json_loads[{size}]", lambda p=payload: json.loads(p)
+            # JSONField round trip (Channel.context) and API payloads, stdlib vs fast_json
+            yield (
+                f"context_field_encode[{size}]",
+                lambda c=conversation: json.dumps(c, cls=FastJSONEncoder),
+            )
+            yield (
+                f"context_field_decode[{size}]",
+                lambda p=payload: json.loads(p, cls=FastJSONDecoder),
+            )
+            response = {"conversation": conversation}
+            yield (
+                f"render_conversation_stdlib[{size}]",
+                lambda r=response: JSONRenderer().render(r),
+            )
+            yield (
+                f"render_conversation_fast[{size}]",
+                lambda r=response: FastJSONRenderer().render(r),
+            )
+            body = json.dumps(response).encode()
+            yield (
+                f"parse_conversation_stdlib[{size}]",
+                lambda b=body: JSONParser().parse(io.BytesIO(b)),
+            )
+            yield (
+                f"parse_conversation_fast[{size}]",
+                lambda b=body: FastJSONParser().parse(io.BytesIO(b)),
+            )
+
+        exam = {"questions_answers": _exam_questions(100)}
+        yield "render_exam_stdlib[100]", lambda: JSONRenderer().render(exam)
+        yield "render_exam_fast[100]", lambda: FastJSONRenderer().render(exam)
+
+        cost = token_calculation.sum_input_output_token_cost("gpt-4o-mini", 1200, 300)
+        yield (
+            "sum_input_output_token_cost",
+            lambda: token_calculation.sum_input_output_token_cost(
+                "gpt-4o-mini", 1200, 300, cached_input_tokens=1024
+            ),
+        )
+        yield (
+            "update_token_cost",
+            lambda: token_calculation.update_token_cost(cost, cost),
+        )
+        yield (
+            "GenerateExamSerializer.validate",
+            lambda: GenerateExamSerializer(data=EXAM_PAYLOAD).is_valid(),
+        )
+
+        pdf, docx = _sample_pdf(), _sample_docx()
+        yield "read_file[pdf]", lambda: file_loader.read_file(io.BytesIO(pdf))
+        yield "read_file[docx]", lambda: file_loader.read_file(io.BytesIO(docx))
+        book = _sample_pdf(pages=300)
+        yield (
+            "read_document[pdf 300p, 30p budget]",
+            lambda: file_loader.read_document(book, "pdf", 30, 20000),
+        )
+
+        image = io.BytesIO(b"\xff\xd8\xff" + b"\x00" * (1024 * 1024))
+        yield (
+            "convert_byte_image2base64[1MB]",
+            lambda: image_analyze.convert_byte_image2base64(image),
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        for name, func in self.benchmarks(options["sizes"]):
+            if options["filter"] and options["filter"] not in name:
+                continue
+            timer = timeit.Timer(func)
+            number, _ = timer.autorange()
+            runs = [t / number * 1e6 for t in timer.repeat(options["repeat"], number)]
+            results[name] = {
+                "min_us": round(min(runs), 2),
+                "median_us": round(statistics.median(runs), 2),
+                "loops": number,
+            }
+            self.stdout.write(
+                f"{name:45} min={results[name]['min_us']:>14.2f}us "
+                f"median={results[name]['median_us']:>14.2f}us"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+            tolerance = options["max_regression"]
+            regressions = [
+                f"{name}: {result['min_us']}us > {baseline[name]['min_us']}us"
+                for name, result in results.items()
+                if name in baseline
+                and result["min_us"] > baseline[name]["min_us"] * (1 + tolerance)
+            ]
+            if regressions:
+                raise CommandError(
+                    "Performance regression:\n  " + "\n  ".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
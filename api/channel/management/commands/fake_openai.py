@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from utils.openai_logic.fake_server import FakeConfig, FakeResponsesServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the offline OpenAI Responses API stand-in. "
+        "Point the app at it with OPENAI_BASE_URL=http://<host>:<port>/v1."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=int, default=200)
+        parser.add_argument("--jitter-ms", type=int, default=50)
+        parser.add_argument("--output-tokens", type=int, default=150)
+        parser.add_argument(
+            "--input-tokens",
+            type=int,
+            default=None,
+            help="Fixed input token count (default: estimated from the request)",
+        )
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--error-status", type=int, default=429)
+
+    def handle(self, *args, **options):
+        config = FakeConfig(
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            output_tokens=options["output_tokens"],
+            input_tokens=options["input_tokens"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+        )
+        server = FakeResponsesServer((options["host"], options["port"]), config)
+        self.stdout.write(f"Fake OpenAI server listening on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
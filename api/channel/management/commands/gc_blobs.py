@@ -0,0 +1,106 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api.channel.models import Attachment, Blob
+from utils.file_logic.file_saver import BLOB_DIR, blob_relative_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount blob references from the attachment table and delete blobs "
+        "(rows and files) that nothing references any more."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=24,
+            help="Keep unreferenced blobs/temp files younger than this (in-flight uploads)",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        cutoff = timezone.now() - timedelta(hours=options["grace_hours"])
+
+        # 1) Repair reference counts (requests that failed after storing a blob)
+        drifted = list(
+            Blob.objects.annotate(refs=Count("attachment"))
+            .exclude(ref_count=F("refs"))
+            .values_list("sha256", flat=True)
+        )
+        repaired = len(drifted)
+        if drifted and not dry_run:
+            # Counted inside the UPDATE, so increments made since the query
+            # above are not overwritten
+            refs = (
+                Attachment.objects.filter(blob=OuterRef("pk"))
+                .order_by()
+                .values("blob")
+                .annotate(n=Count("id"))
+                .values("n")
+            )
+            Blob.objects.filter(pk__in=drifted).update(
+                ref_count=Coalesce(Subquery(refs, output_field=IntegerField()), 0)
+            )
+
+        # 2) Delete blobs unreferenced and not uploaded again within the
+        # grace period (blobs of documents still queued for indexing are kept)
+        orphaned = {
+            "attachment__isnull": True,
+            "documentindexjob__isnull": True,
+            "last_referenced_at__lt": cutoff,
+        }
+        orphans = Blob.objects.filter(**orphaned).values_list("sha256", "size")
+        deleted = freed = 0
+        for sha256, size in list(orphans):
+            if dry_run:
+                deleted += 1
+                freed += size
+                continue
+            # The row goes first, locked and re-checked; the file only if the
+            # row did, before the lock is released (store_blob then writes
+            # the file again for a row it has to recreate)
+            with transaction.atomic():
+                locked = (
+                    Blob.objects.select_for_update(of=("self",))
+                    .filter(pk=sha256, **orphaned)
+                    .values_list("pk", flat=True)
+                    .first()
+                )
+                if locked is None:
+                    continue  # uploaded or referenced again meanwhile
+                Blob.objects.filter(pk=sha256).delete()
+                path = os.path.join(settings.MEDIA_ROOT, blob_relative_path(sha256))
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            deleted += 1
+            freed += size
+
+        # 3) Remove temp files left behind by interrupted uploads
+        stale = 0
+        tmp_dir = os.path.join(settings.MEDIA_ROOT, BLOB_DIR, "tmp")
+        if os.path.isdir(tmp_dir):
+            oldest = time.time() - options["grace_hours"] * 3600
+            for entry in os.scandir(tmp_dir):
+                if entry.is_file() and entry.stat().st_mtime < oldest:
+                    stale += 1
+                    if not dry_run:
+                        os.unlink(entry.path)
+
+        prefix = "[dry run] " if dry_run else ""
+        self.stdout.write(
+            f"{prefix}repaired {repaired} ref counts, deleted {deleted} blobs "
+            f"({freed} bytes), removed {stale} stale temp files"
+        )
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.file_logic import index_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Index the pages of uploaded documents past the per-upload budget "
+        "(DOCUMENT_MAX_PAGES / DOCUMENT_MAX_TOKENS). Run it with --loop as a "
+        "worker process, or without to drain the queue once (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new documents"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty (with --loop)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        while True:
+            done, failed = index_jobs.run_batch(batch_size)
+            if done or failed:
+                self.stdout.write(f"indexed {done}, failed {failed}")
+            if done + failed < batch_size:
+                if not options["loop"]:
+                    return
+                time.sleep(options["interval"])
@@ -0,0 +1,300 @@
+import json
+import os
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from api.channel.models import Channel
+from api.subscriptions.models import SubscriptionPlan
+from api.user.models import User, UserCredit
+from utils.auth.stateless_jwt import ClaimsAccessToken
+from utils.openai_logic import client_create
+from utils.openai_logic.fake_server import FakeConfig, start_fake_server
+from utils.openai_logic.prompt_cache import SYSTEM_PROMPT
+
+LOADTEST_EMAIL = "loadtest@campused.local"
+
+EXAM_PAYLOAD = {
+    "exam": "JEE",
+    "subject": "Physics",
+    "difficulty": "medium",
+    "language": "english",
+    "mode": "mcq",
+    "count": 5,
+}
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(
+        int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1
+    )
+    return sorted_values[index]
+
+
+def _rss_mb():
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return round(resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+
+
+def _peak_rss_mb():
+    # Highest RSS of the whole run so far; ru_maxrss is reported in KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the channel, exam and subscription endpoints in-process at a target "
+        "concurrency and report p50/p95/p99 latency, throughput, DB queries per "
+        "request and RSS. Run it against a disposable database: it creates a "
+        f"{LOADTEST_EMAIL} user and channels. All requests come from that one "
+        "user, so the per-user LLM limits (LLM_RATE_PER_MINUTE, "
+        "LLM_USER_MAX_INFLIGHT) are lifted for the run unless --admission is "
+        "given; the process-wide upstream gate always applies."
+    )
+
+    scenarios = {
+        "channel-create": lambda ctx, c: c.post("/api/channel/", {"q": ctx["query"]}),
+        "channel-patch": lambda ctx, c: c.post(
+            f"/api/channel/{ctx['channel_id']}", {"q": ctx["query"]}
+        ),
+        "channel-get": lambda ctx, c: c.get(f"/api/channel/{ctx['channel_id']}"),
+        "exam-generation": lambda ctx, c: c.post(
+            "/api/channel/exam-generation",
+            EXAM_PAYLOAD,
+            content_type="application/json",
+        ),
+        "plans": lambda ctx, c: c.get("/api/subscriptions/get-subscription-plans"),
+        "credits": lambda ctx, c: c.get("/api/auth/token-credits"),
+        "create-order": lambda ctx, c: c.post(
+            "/api/subscriptions/create-order",
+            {"plan_id": ctx["plan_id"]},
+            content_type="application/json",
+        ),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(self.scenarios),
+            help="Scenario to run (repeatable, default: all but create-order)",
+        )
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--history",
+            type=int,
+            default=20,
+            help="Messages pre-seeded in each channel used by channel-patch/get",
+        )
+        parser.add_argument("--query", default="Explain Newton's second law.")
+        parser.add_argument(
+            "--fake-openai",
+            action="store_true",
+            help="Start the offline OpenAI stand-in in-process and use it",
+        )
+        parser.add_argument("--latency-ms", type=int, default=200)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument(
+            "--admission",
+            action="store_true",
+            help="Keep the per-user LLM rate and in-flight limits for the run",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument(
+            "--baseline", help="JSON report of a previous run to gate regressions"
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=0.10,
+            help="Allowed relative regression against --baseline (default: 0.10)",
+        )
+
+    def handle(self, *args, **options):
+        names = options["scenario"] or [
+            name for name in self.scenarios if name != "create-order"
+        ]
+
+        if options["fake_openai"]:
+            server = start_fake_server(
+                FakeConfig(
+                    latency_ms=options["latency_ms"],
+                    error_rate=options["error_rate"],
+                )
+            )
+            client_create.client.base_url = server.base_url
+            self.stdout.write(f"Using fake OpenAI server at {server.base_url}")
+
+        user = self._setup_user()
+        token = str(ClaimsAccessToken.for_user(user))
+        plan = SubscriptionPlan.objects.order_by("token_limit").first()
+        if "create-order" in names and plan is None:
+            raise CommandError("create-order needs at least one SubscriptionPlan.")
+
+        report = {
+            "config": {
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "history": options["history"],
+                "admission": options["admission"],
+            },
+            "scenarios": {},
+        }
+        limits = {}
+        if not options["admission"]:
+            # One user stands in for many: its bucket and in-flight cap would
+            # turn most LLM requests into 429s
+            limits = {
+                "LLM_RATE_PER_MINUTE": 0,
+                "LLM_USER_MAX_INFLIGHT": options["concurrency"],
+            }
+        with override_settings(**limits):
+            self._run_all(names, plan, user, token, report, options)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+
+        if options["baseline"]:
+            self._gate(report, options["baseline"], options["max_regression"])
+
+    def _run_all(self, names, plan, user, token, report, options):
+        for name in names:
+            ctx = {
+                "query": options["query"],
+                "plan_id": str(plan.id) if plan else None,
+            }
+            result = self._run(name, ctx, user, token, options)
+            report["scenarios"][name] = result
+            self.stdout.write(
+                f"{name:16} ok={result['ok']:<5} err={result['errors']:<4} "
+                f"p50={result['p50_ms']:>8.1f}ms p95={result['p95_ms']:>8.1f}ms "
+                f"p99={result['p99_ms']:>8.1f}ms rps={result['throughput_rps']:>7.1f} "
+                f"queries/req={result['queries_per_request']:>5.1f} "
+                f"rss={result['rss_mb']}MB peak={result['peak_rss_mb']}MB"
+            )
+
+    def _setup_user(self):
+        user, created = User.objects.get_or_create(
+            email=LOADTEST_EMAIL,
+            defaults={"first_name": "Load", "last_name": "Test", "is_active": True},
+        )
+        if created:
+            user.set_unusable_password()
+            user.save()
+        UserCredit.objects.update_or_create(
+            user=user,
+            defaults={
+                "total_tokens": 10**9,
+                "used_tokens": 0,
+                "remaining_tokens": 10**9,
+            },
+        )
+        return user
+
+    def _seed_channel(self, user, history):
+        context = [{"role": "system", "content": SYSTEM_PROMPT}]
+        for i in range(history // 2):
+            context.append({"role": "user", "content": f"Question {i}"})
+            context.append({"role": "assistant", "content": "lorem ipsum " * 50})
+        return Channel.objects.create(user=user, title="load test", context=context)
+
+    def _run(self, name, ctx, user, token, options):
+        host = next(
+            (h for h in settings.ALLOWED_HOSTS if h and "*" not in h), "localhost"
+        )
+        per_worker = threading.local()
+        latencies, queries, errors = [], [], []
+        lock = threading.Lock()
+        call = self.scenarios[name]
+
+        def worker(_):
+            if not hasattr(per_worker, "client"):
+                per_worker.client = Client(
+                    HTTP_AUTHORIZATION=f"Bearer {token}", HTTP_HOST=host
+                )
+                per_worker.ctx = dict(ctx)
+                if name.startswith("channel-") and name != "channel-create":
+                    per_worker.ctx["channel_id"] = self._seed_channel(
+                        user, options["history"]
+                    ).id
+
+            executed = []
+
+            def count(execute, sql, params, many, context):
+                executed.append(sql)
+                return execute(sql, params, many, context)
+
+            start = time.perf_counter()
+            with connection.execute_wrapper(count):
+                response = call(per_worker.ctx, per_worker.client)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+                else:
+                    latencies.append(elapsed)
+                    queries.append(len(executed))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(worker, range(options["requests"])))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "ok": len(latencies),
+            "errors": len(errors),
+            "error_statuses": sorted(set(errors)),
+            "p50_ms": round(_percentile(latencies, 50), 2),
+            "p95_ms": round(_percentile(latencies, 95), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+            "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+            "queries_per_request": (
+                round(sum(queries) / len(queries), 2) if queries else 0.0
+            ),
+            "rss_mb": _rss_mb(),
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+
+    def _gate(self, report, baseline_path, tolerance):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for name, result in report["scenarios"].items():
+            base = baseline.get("scenarios", {}).get(name)
+            if not base:
+                continue
+            for metric in ("p95_ms", "p99_ms", "queries_per_request", "rss_mb"):
+                if (
+                    base.get(metric)
+                    and result[metric] is not None
+                    and result[metric] > base[metric] * (1 + tolerance)
+                ):
+                    regressions.append(
+                        f"{name}.{metric}: {result[metric]} > {base[metric]}"
+                    )
+            if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{name}.throughput_rps: {result['throughput_rps']} "
+                    f"< {base['throughput_rps']}"
+                )
+
+        if regressions:
+            raise CommandError("Performance regression:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from api.channel.models import Channel, Exam, SearchEntry
+from utils.search_logic import search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search index (search_entry) from every channel and exam, "
+        "e.g. after enabling search on an existing database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        SearchEntry.objects.all().delete()
+        batch_size = options["batch_size"]
+
+        channels = 0
+        for channel in Channel.objects.only(
+            "id", "user_id", "title", "context"
+        ).iterator(chunk_size=batch_size):
+            search_index.sync_channel(channel)
+            channels += 1
+
+        exams = 0
+        for exam in Exam.objects.iterator(chunk_size=batch_size):
+            search_index.index_exam(exam)
+            exams += 1
+
+        self.stdout.write(
+            f"indexed {channels} channels and {exams} exams "
+            f"({SearchEntry.objects.count()} entries)"
+        )
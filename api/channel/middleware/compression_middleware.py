@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from utils.http_logic import compression
+
+# Bodies worth compressing; attachments (PDF, DOCX, images) are already
+# compressed and never match
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/markdown", "text/html")
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress JSON/text responses under COMPRESSION_PATHS with the best
+    encoding the client accepts (br, zstd, gzip; see utils.http_logic).
+
+    Left untouched: responses already encoded, smaller than
+    COMPRESSION_MIN_SIZE, files and byte ranges served by FileFetchView, and
+    Server-Sent Events, whose events must reach the client unbuffered.
+    Streaming JSON is compressed chunk by chunk with a flush after each one.
+    """
+
+    def process_response(self, request, response):
+        if not request.path.startswith(tuple(settings.COMPRESSION_PATHS)):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if (
+            content_type not in COMPRESSIBLE_TYPES
+            or response.has_header("Content-Encoding")
+            or response.has_header("Content-Range")
+            or response.has_header("Content-Disposition")
+            or isinstance(response, FileResponse)
+        ):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(
+                    encoding, response.streaming_content
+                )
+            else:
+                response.streaming_content = compression.compress_stream(
+                    encoding, response.streaming_content
+                )
+            # The compressed size is only known once the stream has ended
+            del response.headers["Content-Length"]
+        else:
+            compressed = compression.compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # A strong ETag names the identity bytes; RFC 9110 8.8.1
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,19 @@
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from utils.db_logic import replica_router
+
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    """
+    After a successful write request, pin the user's reads to the primary for
+    REPLICA_STICKY_SECONDS so replica lag never hides what they just created.
+    """
+
+    def process_response(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            replica_router.mark_wrote(user)
+        return response
@@ -5,7 +5,7 @@ from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 
 from api.user.models import UserCredit
-from utils.openai_logic import token_calculation
+from utils.openai_logic import prompt_cache
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +24,9 @@ class TokenUsageMiddleware(MiddlewareMixin):
         # If request.user is Anonymous, try to authenticate using DRF/SimpleJWT so bearer tokens work here
         if not user or not getattr(user, "is_authenticated", False):
             try:
-                from rest_framework_simplejwt.authentication import JWTAuthentication
+                from utils.auth.stateless_jwt import StatelessJWTAuthentication
 
-                jwt_auth = JWTAuthentication()
+                jwt_auth = StatelessJWTAuthentication()
                 auth_result = jwt_auth.authenticate(
                     request
                 )  # returns (user, token) or None
@@ -77,14 +77,9 @@ class TokenUsageMiddleware(MiddlewareMixin):
 
             # --- Example: get token data from channel context ---
             if hasattr(request, "gather_tokens"):  # if you attach it in the chat logic
+                # Cost is priced per call (with the model actually used) in the views,
+                # credits are counted in raw tokens here.
                 gather_tokens = request.gather_tokens
-                token_summary = token_calculation.sum_input_output_token_cost(
-                    model=gather_tokens["model"],
-                    input_tokens=gather_tokens["input"],
-                    output_tokens=gather_tokens["output"],
-                    tier="Standard",
-                )
-
                 total_used = gather_tokens["input"] + gather_tokens["output"]
 
                 # Safe update
@@ -98,6 +93,15 @@ class TokenUsageMiddleware(MiddlewareMixin):
                 # Add updated tokens to response headers
                 response["X-User-Remaining-Tokens"] = credit.remaining_tokens
 
+                # Track upstream prompt cache hits per endpoint
+                cached = gather_tokens.get("cached", 0)
+                match = getattr(request, "resolver_match", None)
+                endpoint = match.url_name if match else request.path
+                prompt_cache.record(endpoint, gather_tokens["input"], cached)
+                response["X-Prompt-Cache-Hit-Rate"] = prompt_cache.hit_rate(
+                    gather_tokens["input"], cached
+                )
+
             return response
 
         except Exception as e:
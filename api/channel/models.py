@@ -4,6 +4,7 @@ from django.db import models
 from django.utils import timezone
 
 from api.user.models import User
+from utils.json_logic.fast_json import FastJSONDecoder, FastJSONEncoder
 
 # Create your models here.
 
@@ -11,7 +12,9 @@ from api.user.models import User
 class Channel(models.Model):
     id = models.UUIDField(default=uuid4, primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    context = models.JSONField(default=list)
+    context = models.JSONField(
+        default=list, encoder=FastJSONEncoder, decoder=FastJSONDecoder
+    )
     title = models.CharField(max_length=50)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
@@ -30,7 +33,9 @@ class Exam(models.Model):
     difficulty = models.CharField(max_length=50)
     language = models.CharField(max_length=50)
     mode = models.CharField(max_length=50)
-    questions_answers = models.JSONField(default=list)
+    questions_answers = models.JSONField(
+        default=list, encoder=FastJSONEncoder, decoder=FastJSONDecoder
+    )
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
     token_cost = models.JSONField(default=dict)
@@ -41,3 +46,131 @@ class Exam(models.Model):
 
     def __str__(self):
         return f"{self.id} - {self.user} - {self.updated_at}"
+
+
+class Blob(models.Model):
+    """
+    Attachment content stored once per SHA-256 under
+    MEDIA_ROOT/blobs/<aa>/<bb>/<sha256>, shared by every Attachment with the
+    same bytes. ref_count is kept in sync by file_saver and the Attachment
+    post_delete signal; manage.py gc_blobs recounts it and removes blobs
+    unreferenced since before its grace period (last_referenced_at is
+    stamped by every upload of the content).
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_referenced_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "attachment_blob"
+
+    def __str__(self):
+        return f"{self.sha256} | refs: {self.ref_count}"
+
+
+class Attachment(models.Model):
+    """A file uploaded to a channel: its display name mapped to a content blob."""
+
+    id = models.UUIDField(default=uuid4, primary_key=True)
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE)
+    name = models.CharField(max_length=255)  # unique display name inside the channel
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "attachment"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["channel", "name"], name="attachment_channel_name_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.channel_id} - {self.name}"
+
+
+class DocumentChunk(models.Model):
+    """
+    A passage of a document uploaded to a channel. Chunks are the unit of
+    retrieval: each turn sends the model the few most relevant ones
+    (utils.file_logic.doc_index) instead of the whole document.
+    """
+
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE)
+    document = models.CharField(max_length=255)  # uploaded file name
+    page = models.PositiveIntegerField()
+    position = models.PositiveIntegerField()  # order inside the document
+    content = models.TextField()
+
+    class Meta:
+        db_table = "document_chunk"
+        indexes = [models.Index(fields=["channel"])]
+
+    def __str__(self):
+        return f"{self.channel_id} - {self.document} p.{self.page}"
+
+
+class DocumentIndexJob(models.Model):
+    """
+    The part of an uploaded document past the pages indexed while the upload
+    was handled (DOCUMENT_MAX_PAGES / DOCUMENT_MAX_TOKENS). The
+    index_documents worker adds its chunks, up to DOCUMENT_INDEX_MAX_PAGES,
+    and deletes the job; until then retrieval covers the first pages.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"), (FAILED, "Failed")]
+
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE)
+    document = models.CharField(max_length=255)  # uploaded file name
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT)
+    start_page = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # A running job whose worker died is claimed again after this
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "document_index_job"
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.channel_id} - {self.document} from p.{self.start_page}"
+
+
+class SearchEntry(models.Model):
+    """
+    One searchable text of a user: a channel message (position = index in
+    Channel.context, -1 for the title) or an exam question (position = index
+    in Exam.questions_answers). Kept in sync by the post_save signals in
+    signals.py, which only append what is new.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE, null=True)
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, null=True)
+    position = models.IntegerField()
+    role = models.CharField(max_length=20)
+    content = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "search_entry"
+        indexes = [
+            models.Index(fields=["user"]),
+            models.Index(fields=["channel", "position"]),
+        ]
+        # The PostgreSQL full-text index depends on the database and on
+        # SEARCH_CONFIG, so it is managed by search_index.ensure_fts_index()
+        # after each migrate rather than declared here.
+
+    def __str__(self):
+        return f"{self.user_id} - {self.channel_id or self.exam_id} #{self.position}"
@@ -1,13 +1,15 @@
 # exam/serializers.py
 from rest_framework import serializers
 
+from utils.search_logic import search_index
+
 from .constants import (
     ALLOWED_DIFFICULTIES,
     ALLOWED_LANGUAGES,
     ALLOWED_MODES,
     EXAM_SUBJECTS,
 )
-from .models import Channel, Exam
+from .models import Channel, Exam, SearchEntry
 
 
 class ChannelListSerializer(serializers.ModelSerializer):
@@ -68,3 +70,43 @@ class ExamGetSerializer(serializers.ModelSerializer):
             "questions_answers",
             "updated_at",
         ]
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    type = serializers.SerializerMethodField()
+    id = serializers.SerializerMethodField()
+    title = serializers.SerializerMethodField()
+    snippet = serializers.SerializerMethodField()
+    rank = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SearchEntry
+        fields = [
+            "type",
+            "id",
+            "title",
+            "position",
+            "role",
+            "snippet",
+            "rank",
+            "created_at",
+        ]
+
+    def get_type(self, obj):
+        return "channel" if obj.channel_id else "exam"
+
+    def get_id(self, obj):
+        return obj.channel_id or obj.exam_id
+
+    def get_title(self, obj):
+        if obj.channel_id:
+            return obj.channel.title
+        return f"{obj.exam.exam} - {obj.exam.subject}"
+
+    def get_snippet(self, obj):
+        if hasattr(obj, "snippet"):
+            return obj.snippet
+        return search_index.snippet(obj.content, self.context["query"])
+
+    def get_rank(self, obj):
+        return getattr(obj, "rank", None)
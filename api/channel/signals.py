@@ -0,0 +1,31 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.search_logic import search_index
+
+from .models import Attachment, Blob, Channel, Exam
+
+
+@receiver(post_delete, sender=Attachment)
+def release_blob(sender, instance, **kwargs):
+    """Drop the blob reference held by a deleted attachment (files go in gc_blobs)."""
+    Blob.objects.filter(pk=instance.blob_id).update(ref_count=F("ref_count") - 1)
+
+
+@receiver(post_save, sender=Channel)
+def index_channel(sender, instance, raw=False, **kwargs):
+    """Add the messages appended by this save to the search index."""
+    if not raw:
+        search_index.sync_channel(instance)
+
+
+@receiver(post_save, sender=Exam)
+def index_exam(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search_index.index_exam(instance)
+
+
+def create_search_index(sender, using="default", **kwargs):
+    """post_migrate: the PostgreSQL full-text index (see search_index)."""
+    search_index.ensure_fts_index(using)
@@ -13,5 +13,13 @@ urlpatterns = [
     ),
     path("exam-generation", V.GenerateExamAPIView.as_view(), name="exam-generation"),
     path("list-exams", V.ListExamView.as_view(), name="list-exams"),
+    path("search", V.SearchView.as_view(), name="search"),
     path("exam/<uuid:exam_id>", view=V.GetExamView.as_view(), name="exam"),
+    path(
+        "prompt-cache-stats",
+        V.PromptCacheStatsView.as_view(),
+        name="prompt-cache-stats",
+    ),
+    path("db-stats", V.DatabaseStatsView.as_view(), name="db-stats"),
+    path("admission-stats", V.AdmissionStatsView.as_view(), name="admission-stats"),
 ]
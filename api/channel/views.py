@@ -1,31 +1,44 @@
-import copy
 import logging
 import os
 import uuid
 
 from django.conf import settings
-from django.http import FileResponse, Http404
+from django.db import transaction
+from django.http import Http404
 from rest_framework import status
 from rest_framework.generics import ListAPIView, get_object_or_404
-from rest_framework.parsers import FormParser, MultiPartParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import FormParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from utils.file_logic import file_loader, file_saver
+from utils.db_logic import connection_stats
+from utils.db_logic.replica_router import ReplicaReadMixin
+from utils.file_logic import (
+    doc_index,
+    file_loader,
+    file_saver,
+    file_sender,
+    upload_guard,
+)
+from utils.http_logic import admission
 from utils.openai_logic import (
     exam_generation,
     image_analyze,
+    prompt_cache,
     text_generation,
     token_calculation,
 )
+from utils.search_logic import search_index
 
-from .models import Channel, Exam
+from .models import Attachment, Channel, DocumentChunk, DocumentIndexJob, Exam
 from .serializers import (
     ChannelListSerializer,
     ExamGetSerializer,
     ExamListSerializer,
     GenerateExamSerializer,
+    SearchResultSerializer,
 )
 
 ALLOWED_TYPES = [
@@ -36,18 +49,20 @@ ALLOWED_TYPES = [
     "image/webp",
 ]
 
-# Limit uploads to 10 MB per file by default; can be overridden in Django settings
-MAX_FILE_SIZE = getattr(settings, "MAX_UPLOAD_FILE_SIZE", 20 * 1024 * 1024)
+# Per-file / per-request upload limits, enforced while the body is parsed
+MAX_FILE_SIZE = settings.MAX_UPLOAD_FILE_SIZE
+MAX_REQUEST_SIZE = settings.MAX_UPLOAD_REQUEST_SIZE
 
 logger = logging.getLogger(__name__)
 
-select_openai_model = settings.OPENAI_MODEL
-
 
 # Create your views here.
-class ChannelView(APIView):
+class ChannelView(admission.AdmissionControlMixin, APIView):
     permission_classes = [IsAuthenticated]
-    parser_classes = [FormParser, MultiPartParser]
+    parser_classes = [FormParser, upload_guard.GuardedMultiPartParser]
+    upload_max_file_size = MAX_FILE_SIZE
+    upload_max_request_size = MAX_REQUEST_SIZE
+    upload_allowed_types = ALLOWED_TYPES
 
     def post(self, request):
         uploaded_files = request.FILES.getlist("files")
@@ -56,49 +71,36 @@ class ChannelView(APIView):
             return Response(
                 {"error": "No files or query provided"}, status=400
             )  # 400 Bad Request
-        conversation = [
-            {
-                "role": "system",
-                "content": "You are a Exam Preparation helpful assistant. You help students to prepare for their exams by providing them with relevant information and resources. You can also help them to create study plans and schedules. You are very friendly and always respond in a positive manner. You can provide the answer directly or MCQ questions if the user asks for it or on your own for their better clarity about the topics.",
-            }
-        ]
+        conversation = [{"role": "system", "content": prompt_cache.SYSTEM_PROMPT}]
 
-        gather_tokens = {"input": 0, "output": 0}
+        gather_tokens = {"input": 0, "output": 0, "cached": 0}
+        gather_tokens_cost_sum = {}
+        channel_id = uuid.uuid4()
+        chunks = []
+        index_jobs = []
+        blobs = {}  # uploaded file -> Blob, so each upload is stored once
 
         logger.info("Received %d files and query: %s", len(uploaded_files), query)
         for file in uploaded_files:
-            if file.content_type not in ALLOWED_TYPES:
-                return Response(
-                    {"error": f"File type {file.content_type} not allowed"}, status=400
-                )
-
             ext = os.path.splitext(file.name)[1].lower().strip(".")
             logger.debug("Processing file: %s with extension: %s", file.name, ext)
-
-            # Basic file size check
-            try:
-                size = getattr(file, "size", None)
-                if size is not None and size > MAX_FILE_SIZE:
-                    logger.warning(
-                        "File %s exceeds max size (%d > %d)",
-                        file.name,
-                        size,
-                        MAX_FILE_SIZE,
-                    )
-                    return Response({"error": "File too large"}, status=400)
-            except Exception:
-                # don't fail the whole request if size can't be determined
-                logger.debug(
-                    "Could not determine file size for %s", file.name, exc_info=True
-                )
             if ext in ["jpg", "jpeg", "png", "webp"]:
                 logger.debug("Processing image file: %s", file.name)
                 try:
-                    image_transcribe, image_input_tokens, image_output_tokens = (
-                        image_analyze.image_analyze(file)
-                    )
+                    (
+                        image_transcribe,
+                        image_input_tokens,
+                        image_output_tokens,
+                        image_model,
+                    ) = image_analyze.image_analyze(file)
                     gather_tokens["input"] += image_input_tokens
                     gather_tokens["output"] += image_output_tokens
+                    gather_tokens_cost_sum = token_calculation.add_model_usage(
+                        gather_tokens_cost_sum,
+                        image_model,
+                        image_input_tokens,
+                        image_output_tokens,
+                    )
                 except Exception:
                     logger.exception("Failed to analyze image: %s", file.name)
                     return Response(
@@ -116,65 +118,85 @@ class ChannelView(APIView):
             elif ext in ["docx", "pdf"]:
                 logger.debug("Processing document file: %s", file.name)
                 try:
-                    docx_transcribe = file_loader.read_file(file.file)
+                    conversation.append(
+                        document_message(
+                            file, ext, channel_id, chunks, index_jobs, blobs
+                        )
+                    )
                 except Exception:
                     logger.exception("Failed to read document: %s", file.name)
                     return Response(
                         {"error": "Failed to process document file"}, status=500
                     )
-                logger.debug("Extracted text from document: %s", docx_transcribe)
-                conversation.append(
-                    {
-                        "role": "system",
-                        "content": "This is the information that I have extracted from the document that user shared:\n\n"
-                        + docx_transcribe,
-                    }
-                )
 
-        channel_id = uuid.uuid4()
+        attachments = []
         if query:
             try:
-                # sorted_conversation = remove_file_name_conversation(conversation)
-                res, text_input_tokens, text_output_tokens = (
-                    text_generation.text_generation(
-                        conversation + [{"role": "user", "content": query}],
-                        select_openai_model,
-                    )
+                (
+                    res,
+                    text_input_tokens,
+                    text_output_tokens,
+                    text_model,
+                    text_cached_tokens,
+                ) = text_generation.text_generation(
+                    prompt_cache.build_model_input(
+                        conversation,
+                        query,
+                        document_context(None, conversation, query, chunks),
+                    ),
+                    cache_key=str(channel_id),
                 )
                 gather_tokens["input"] += text_input_tokens
                 gather_tokens["output"] += text_output_tokens
+                gather_tokens["cached"] += text_cached_tokens
+                gather_tokens["model"] = text_model
+                gather_tokens_cost_sum = token_calculation.add_model_usage(
+                    gather_tokens_cost_sum,
+                    text_model,
+                    text_input_tokens,
+                    text_output_tokens,
+                    cached_input_tokens=text_cached_tokens,
+                )
             except Exception:
                 logger.exception("Text generation failed for query: %s", query)
                 return Response({"error": "Failed to generate text"}, status=500)
 
             user_query = {"role": "user", "content": query}
             if uploaded_files:
-                files = file_saver.save_uploaded_files(
-                    request.user.id, channel_id, uploaded_files
+                files, attachments = file_saver.save_uploaded_files(
+                    request.user.id, channel_id, uploaded_files, blobs
                 )
                 user_query["files"] = files
             query_res = {"role": "assistant", "content": res}
             conversation.extend([user_query, query_res])
 
-        gather_tokens_cost_sum = token_calculation.sum_input_output_token_cost(
-            select_openai_model, gather_tokens["input"], gather_tokens["output"]
-        )
-
         try:
-            title, _, _ = text_generation.title_generation(query)
+            title, title_input_tokens, title_output_tokens, title_model = (
+                text_generation.title_generation(query)
+            )
+            gather_tokens_cost_sum = token_calculation.add_model_usage(
+                gather_tokens_cost_sum,
+                title_model,
+                title_input_tokens,
+                title_output_tokens,
+            )
             logger.info(f"Generated Title: {title}")
         except Exception as e:
             logger.warning(f"Title generation failed: {e}")
             title = "new chat"
 
         # that async function response going to use here. in the title section
-        channnel = Channel.objects.create(
-            id=channel_id,
-            user=request.user,
-            title=title,
-            context=conversation,
-            token_cost=gather_tokens_cost_sum,
-        )
+        with transaction.atomic():
+            channnel = Channel.objects.create(
+                id=channel_id,
+                user=request.user,
+                title=title,
+                context=conversation,
+                token_cost=gather_tokens_cost_sum,
+            )
+            file_saver.create_attachments(attachments)
+            DocumentChunk.objects.bulk_create(chunks)
+            DocumentIndexJob.objects.bulk_create(index_jobs)
         logger.info(
             "Conversation saved for user %s (messages=%d)",
             request.user,
@@ -182,7 +204,6 @@ class ChannelView(APIView):
         )
 
         request._request.gather_tokens = gather_tokens
-        request._request.gather_tokens["model"] = select_openai_model
         return Response(
             {
                 "conversation": conversation,
@@ -193,7 +214,7 @@ class ChannelView(APIView):
         )
 
 
-class ListChannelView(ListAPIView):
+class ListChannelView(ReplicaReadMixin, ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ChannelListSerializer
 
@@ -201,9 +222,12 @@ class ListChannelView(ListAPIView):
         return Channel.objects.filter(user=self.request.user).order_by("-updated_at")
 
 
-class PatchChannelView(APIView):
+class PatchChannelView(admission.AdmissionControlMixin, ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [upload_guard.GuardedMultiPartParser, FormParser]
+    upload_max_file_size = MAX_FILE_SIZE
+    upload_max_request_size = MAX_REQUEST_SIZE
+    upload_allowed_types = ALLOWED_TYPES
 
     def get(self, request, channel_id):
         conversation = Channel.objects.get(id=channel_id, user=request.user)
@@ -220,7 +244,8 @@ class PatchChannelView(APIView):
                 {"error": "No files or query provided"}, status=400
             )  # 400 Bad Request
         try:
-            gather_tokens = {"input": 0, "output": 0}
+            gather_tokens = {"input": 0, "output": 0, "cached": 0}
+            gather_tokens_cost_sum = {}
 
             channel = Channel.objects.get(id=channel_id, user=request.user)
             conversation = channel.context
@@ -229,6 +254,10 @@ class PatchChannelView(APIView):
             return Response(
                 {"error": "Channel not found"}, status=status.HTTP_404_NOT_FOUND
             )
+        attachments = []
+        chunks = []
+        index_jobs = []
+        blobs = {}  # uploaded file -> Blob, so each upload is stored once
         logger.info(
             "Patching channel %s: received %d files and query: %s",
             channel_id,
@@ -237,38 +266,26 @@ class PatchChannelView(APIView):
         )
 
         for file in uploaded_files:
-            if file.content_type not in ALLOWED_TYPES:
-                return Response(
-                    {"error": f"File type {file.content_type} not allowed"}, status=400
-                )
-
             ext = os.path.splitext(file.name)[1].lower().strip(".")
             logger.debug("Processing file: %s with extension: %s", file.name, ext)
 
-            # Basic file size check
-            try:
-                size = getattr(file, "size", None)
-                if size is not None and size > MAX_FILE_SIZE:
-                    logger.warning(
-                        "File %s exceeds max size (%d > %d)",
-                        file.name,
-                        size,
-                        MAX_FILE_SIZE,
-                    )
-                    return Response({"error": "File too large"}, status=400)
-            except Exception:
-                logger.debug(
-                    "Could not determine file size for %s", file.name, exc_info=True
-                )
-
             if ext in ["jpg", "jpeg", "png", "webp"]:
                 logger.debug("Processing image file: %s", file.name)
                 try:
-                    image_transcribe, image_input_tokens, image_output_tokens = (
-                        image_analyze.image_analyze(file)
-                    )
+                    (
+                        image_transcribe,
+                        image_input_tokens,
+                        image_output_tokens,
+                        image_model,
+                    ) = image_analyze.image_analyze(file)
                     gather_tokens["input"] += image_input_tokens
                     gather_tokens["output"] += image_output_tokens
+                    gather_tokens_cost_sum = token_calculation.add_model_usage(
+                        gather_tokens_cost_sum,
+                        image_model,
+                        image_input_tokens,
+                        image_output_tokens,
+                    )
 
                 except Exception:
                     logger.exception("Failed to analyze image: %s", file.name)
@@ -287,32 +304,43 @@ class PatchChannelView(APIView):
             elif ext in ["docx", "pdf"]:
                 logger.debug("Processing document file: %s", file.name)
                 try:
-                    docx_transcribe = file_loader.read_file(file.file)
+                    conversation.append(
+                        document_message(
+                            file, ext, channel_id, chunks, index_jobs, blobs
+                        )
+                    )
                 except Exception:
                     logger.exception("Failed to read document: %s", file.name)
                     return Response(
                         {"error": "Failed to process document file"}, status=500
                     )
-                logger.debug("Extracted text from document: %s", docx_transcribe)
-                conversation.append(
-                    {
-                        "role": "system",
-                        "content": "This is the information that I have extracted from the document that user shared:\n\n"
-                        + docx_transcribe,
-                    }
-                )
         if query:
             try:
-                sorted_conversation = remove_file_name_conversation(conversation)
-
-                res, text_input_tokens, text_output_tokens = (
-                    text_generation.text_generation(
-                        sorted_conversation + [{"role": "user", "content": query}],
-                        select_openai_model,
-                    )
+                (
+                    res,
+                    text_input_tokens,
+                    text_output_tokens,
+                    text_model,
+                    text_cached_tokens,
+                ) = text_generation.text_generation(
+                    prompt_cache.build_model_input(
+                        conversation,
+                        query,
+                        document_context(channel_id, conversation, query, chunks),
+                    ),
+                    cache_key=str(channel_id),
                 )
                 gather_tokens["input"] += text_input_tokens
                 gather_tokens["output"] += text_output_tokens
+                gather_tokens["cached"] += text_cached_tokens
+                gather_tokens["model"] = text_model
+                gather_tokens_cost_sum = token_calculation.add_model_usage(
+                    gather_tokens_cost_sum,
+                    text_model,
+                    text_input_tokens,
+                    text_output_tokens,
+                    cached_input_tokens=text_cached_tokens,
+                )
 
             except Exception:
                 logger.exception("Text generation failed for query: %s", query)
@@ -321,25 +349,25 @@ class PatchChannelView(APIView):
             user_query = {"role": "user", "content": query}
 
             if uploaded_files:
-                files = file_saver.save_uploaded_files(
-                    request.user.id, channel_id, uploaded_files
+                files, attachments = file_saver.save_uploaded_files(
+                    request.user.id, channel_id, uploaded_files, blobs
                 )
                 user_query["files"] = files
 
             query_res = {"role": "assistant", "content": res}
             conversation.extend([user_query, query_res])
 
-        gather_tokens_cost_sum = token_calculation.sum_input_output_token_cost(
-            select_openai_model, gather_tokens["input"], gather_tokens["output"]
-        )
-
         channel.context = conversation
         print(channel.token_cost, gather_tokens_cost_sum)
         channel.token_cost = token_calculation.update_token_cost(
             channel.token_cost, gather_tokens_cost_sum
         )
 
-        channel.save()
+        with transaction.atomic():
+            channel.save()
+            file_saver.create_attachments(attachments)
+            DocumentChunk.objects.bulk_create(chunks)
+            DocumentIndexJob.objects.bulk_create(index_jobs)
         logger.info(
             "Updated channel %s for user %s (messages=%d)",
             channel_id,
@@ -347,58 +375,168 @@ class PatchChannelView(APIView):
             len(conversation),
         )
         request._request.gather_tokens = gather_tokens
-        request._request.gather_tokens["model"] = select_openai_model
         return Response(
             {"conversation": conversation},
             status=200,
         )
 
 
-def remove_file_name_conversation(conversation):
-    new_conversation = []
-    for message in conversation:
-        msg_copy = copy.deepcopy(message)
-        msg_copy.pop("files", None)
-        new_conversation.append(msg_copy)
-    return new_conversation
+def document_message(file, ext, channel_id, chunks, index_jobs, blobs):
+    """
+    System message standing for an uploaded document.
+
+    With retrieval on (DOCUMENT_RETRIEVAL_TOP_K > 0) the pages within the
+    DOCUMENT_MAX_PAGES / DOCUMENT_MAX_TOKENS budget are split into
+    DocumentChunk rows, appended to `chunks` for the caller to save, and the
+    message only names the document: each turn then gets the relevant
+    excerpts from document_context(). The pages past the budget (up to
+    DOCUMENT_INDEX_MAX_PAGES) are left to the index_documents worker through
+    a DocumentIndexJob appended to `index_jobs`, its file stored in the blob
+    store and recorded in `blobs` for save_uploaded_files() to reuse.
+    Otherwise the text is inlined, extracted page by page within the same
+    budget.
+
+    Either way the pages covered are recorded under "document" (never sent to
+    the model).
+    """
+    name = os.path.basename(file.name)
+    if settings.DOCUMENT_RETRIEVAL_TOP_K > 0:
+        pages, page_count = file_loader.extract_pages(
+            file.file,
+            ext,
+            settings.DOCUMENT_MAX_PAGES,
+            settings.DOCUMENT_MAX_TOKENS,
+            workers=settings.DOCUMENT_EXTRACT_WORKERS,
+        )
+        chunks.extend(doc_index.build_chunks(channel_id, name, pages))
+        last_page = pages[-1][0] if pages else 0
+        index_limit = settings.DOCUMENT_INDEX_MAX_PAGES
+        if ext == "pdf" and last_page < min(page_count or index_limit, index_limit):
+            blobs[file] = file_saver.store_blob(file)
+            index_jobs.append(
+                DocumentIndexJob(
+                    channel_id=channel_id,
+                    document=name,
+                    blob=blobs[file],
+                    start_page=last_page + 1,
+                )
+            )
+        logger.debug(
+            "Indexed %d of %s pages of document %s", len(pages), page_count, name
+        )
+        return {
+            "role": "system",
+            "content": f"The user shared the document {name}"
+            + (f" ({page_count} pages)" if page_count else "")
+            + ". Relevant excerpts from it are provided with each question.",
+            "document": {
+                "name": name,
+                "page_count": page_count or len(pages),
+                "indexed": True,
+            },
+        }
+
+    extracted = file_loader.extract_document(
+        file.file,
+        ext,
+        settings.DOCUMENT_MAX_PAGES,
+        settings.DOCUMENT_MAX_TOKENS,
+        workers=settings.DOCUMENT_EXTRACT_WORKERS,
+    )
+    logger.debug(
+        "Extracted pages %s of %s from document %s",
+        extracted["pages"],
+        extracted["page_count"],
+        name,
+    )
+    content = (
+        "This is the information that I have extracted from the document that user shared:\n\n"
+        + extracted["text"]
+    )
+    if extracted["truncated"]:
+        content += (
+            f"\n\n(Only pages {extracted['pages'][0]}-{extracted['pages'][-1]}"
+            f" of {extracted['page_count'] or 'many'} were included.)"
+        )
+    return {
+        "role": "system",
+        "content": content,
+        "document": {
+            "name": name,
+            "pages": extracted["pages"],
+            "page_count": extracted["page_count"],
+            "truncated": extracted["truncated"],
+        },
+    }
+
+
+def document_context(channel_id, conversation, query, chunks):
+    """
+    Per-turn model context: the top DOCUMENT_RETRIEVAL_TOP_K chunks of the
+    channel's indexed documents for `query`, within DOCUMENT_RETRIEVAL_MAX_TOKENS.
+    `chunks` are this request's unsaved ones; channel_id None skips the
+    stored chunks (channel not created yet).
+    """
+    if settings.DOCUMENT_RETRIEVAL_TOP_K <= 0:
+        return []
+    if not chunks and not any(
+        message.get("document", {}).get("indexed") for message in conversation
+    ):
+        return []
+    found = doc_index.retrieve(
+        channel_id,
+        query,
+        settings.DOCUMENT_RETRIEVAL_TOP_K,
+        settings.DOCUMENT_RETRIEVAL_MAX_TOKENS,
+        pending=chunks,
+    )
+    if not found:
+        return []
+    return [doc_index.excerpts_message(found)]
 
 
 class FileFetchView(APIView):
     """
-    Securely stream a file belonging to the authenticated user,
-    under media/<user_id>/<channel_id>/<file_name>.
+    Securely serve a file belonging to the authenticated user: the blob of
+    the channel's attachment <file_name>, or the legacy
+    media/<user_id>/<channel_id>/<file_name> for files saved before blobs.
+    Streaming is offloaded to the front proxy when FILE_SERVE_MODE is set.
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request, channel_id, file_name):
-        try:
-            # Verify the channel belongs to the requesting user
-            channel = Channel.objects.get(id=channel_id, user=request.user)
-            print(channel.id)
-        except Channel.DoesNotExist:
-            return Response({"error": "Channel not found or unauthorized"}, status=404)
-
-        # Construct file path
-        file_path = os.path.join(
-            settings.MEDIA_ROOT, str(request.user.id), str(channel_id), file_name
+        # Ownership check and cache validators in one query
+        attachment = (
+            Attachment.objects.filter(
+                channel_id=channel_id, channel__user=request.user, name=file_name
+            )
+            .select_related("blob")
+            .only("created_at", "blob__size")
+            .first()
         )
-        print("file path: ", file_path)
-
-        # Check if file exists
-        if not os.path.exists(file_path):
-            raise Http404("File not found")
+        if attachment is None and (
+            not Channel.objects.filter(id=channel_id, user=request.user).exists()
+        ):
+            return Response({"error": "Channel not found or unauthorized"}, status=404)
 
-        # Stream file instead of loading into memory
+        if attachment is not None:
+            relative_path = file_saver.blob_relative_path(attachment.blob_id)
+        else:
+            relative_path = file_saver.legacy_relative_path(
+                request.user.id, channel_id, file_name
+            )
         try:
-            response = FileResponse(open(file_path, "rb"))
-            response["Content-Disposition"] = f'inline; filename="{file_name}"'
-            return response
+            return file_sender.send_file(
+                request, relative_path, file_name, attachment=attachment
+            )
+        except Http404:
+            raise
         except Exception as e:
             return Response({"error": f"Unable to read file: {str(e)}"}, status=500)
 
 
-class GenerateExamAPIView(APIView):
+class GenerateExamAPIView(admission.AdmissionControlMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -410,7 +548,7 @@ class GenerateExamAPIView(APIView):
 
         try:
             # synchronous call to generate_exam
-            questions_answers, text_input_token, text_output_token = (
+            questions_answers, text_input_token, text_output_token, exam_model = (
                 exam_generation.ExamPrepare(
                     exam=data["exam"],
                     subject=data["subject"],
@@ -423,8 +561,9 @@ class GenerateExamAPIView(APIView):
             print("questions_answers: \n", questions_answers)
             gather_tokens["input"] += text_input_token
             gather_tokens["output"] += text_output_token
+            gather_tokens["model"] = exam_model
             gather_tokens_cost_sum = token_calculation.sum_input_output_token_cost(
-                select_openai_model, gather_tokens["input"], gather_tokens["output"]
+                exam_model, gather_tokens["input"], gather_tokens["output"]
             )
             exam = Exam.objects.create(
                 user=request.user,
@@ -442,7 +581,6 @@ class GenerateExamAPIView(APIView):
                 len(questions_answers),
             )
             request._request.gather_tokens = gather_tokens
-            request._request.gather_tokens["model"] = select_openai_model
             return Response(
                 {
                     "status": "completed",
@@ -463,7 +601,7 @@ class GenerateExamAPIView(APIView):
             )
 
 
-class ListExamView(ListAPIView):
+class ListExamView(ReplicaReadMixin, ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ExamListSerializer
 
@@ -471,7 +609,37 @@ class ListExamView(ListAPIView):
         return Exam.objects.filter(user=self.request.user).order_by("-updated_at")
 
 
-class GetExamView(APIView):
+class SearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class SearchView(ReplicaReadMixin, ListAPIView):
+    """
+    Full-text search over the user's channel messages and exam questions:
+    GET ?q=<words>&page=<n>. Results are ranked and paginated, one per
+    matching message or question, with a snippet around the match.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = SearchResultSerializer
+    pagination_class = SearchPagination
+
+    def get_queryset(self):
+        return search_index.search(self.request.user, self.query)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "query": self.query}
+
+    def list(self, request, *args, **kwargs):
+        self.query = request.query_params.get("q", "").strip()
+        if not self.query:
+            return Response({"error": "No query provided"}, status=400)
+        return super().list(request, *args, **kwargs)
+
+
+class GetExamView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ExamGetSerializer
 
@@ -479,3 +647,39 @@ class GetExamView(APIView):
         exam = get_object_or_404(Exam, id=exam_id, user=request.user)
         serializer = self.serializer_class(exam)
         return Response(serializer.data)
+
+
+class PromptCacheStatsView(APIView):
+    """
+    Staff-only view of the upstream prompt cache hit rate per endpoint
+    (totals since this process started).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(prompt_cache.snapshot(), status=status.HTTP_200_OK)
+
+
+class DatabaseStatsView(APIView):
+    """
+    Staff-only view of database connection reuse in this process: connects
+    per alias and, with DB_POOL on, pool size, waiting requests and saturation.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(connection_stats.snapshot(), status=status.HTTP_200_OK)
+
+
+class AdmissionStatsView(APIView):
+    """
+    Staff-only view of this process's upstream gate for the LLM endpoints:
+    requests in flight, queued, and shed since start.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(admission.get_gate().snapshot(), status=status.HTTP_200_OK)
@@ -3,4 +3,4 @@ from django.contrib import admin
 from . import models
 
 # Register your models here.
-admin.site.register([models.SubscriptionPlan, models.Order])
+admin.site.register([models.SubscriptionPlan, models.Order, models.WebhookEvent])
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.subscription_logic.fake_razorpay import (
+    FakeRazorpayConfig,
+    FakeRazorpayServer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the offline Razorpay Orders API stand-in. "
+        "Point the app at it with RAZORPAY_BASE_URL=http://<host>:<port>."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--latency-ms", type=int, default=150)
+
+    def handle(self, *args, **options):
+        config = FakeRazorpayConfig(
+            latency_ms=options["latency_ms"], key_secret=settings.RAZORPAY_KEY_SECRET
+        )
+        server = FakeRazorpayServer((options["host"], options["port"]), config)
+        self.stdout.write(f"Fake Razorpay server listening on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.subscription_logic import webhooks
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply Razorpay webhook events stored by the webhook endpoint (credit "
+        "paid orders). Nothing is credited from webhooks unless this runs: keep "
+        "it running with --loop as a worker process next to the web processes, "
+        "or run it without --loop to drain the inbox once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new events"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the inbox is empty (with --loop)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        while True:
+            handled = webhooks.process_pending(batch_size)
+            if handled:
+                self.stdout.write(f"handled {handled} events")
+            if handled < batch_size:
+                if not options["loop"]:
+                    return
+                time.sleep(options["interval"])
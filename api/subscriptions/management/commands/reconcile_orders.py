@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from api.subscriptions.models import Order
+from utils.subscription_logic import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Find orders paid at Razorpay but never marked paid here (e.g. a lost "
+        "webhook), mark them paid and credit their plans, and report every "
+        "discrepancy. Set RAZORPAY_BASE_URL to run it against the offline "
+        "stand-in (manage.py fake_razorpay)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Gateway requests in flight (at most RAZORPAY_POOL_SIZE)",
+        )
+        parser.add_argument(
+            "--days", type=int, default=7, help="Only check orders this recent"
+        )
+        parser.add_argument(
+            "--min-age-minutes",
+            type=int,
+            default=15,
+            help="Skip orders whose checkout may still be in progress",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # More threads than pooled connections would only churn connections
+        workers = max(min(options["workers"], settings.RAZORPAY_POOL_SIZE), 1)
+        orders = (
+            Order.objects.filter(
+                is_paid=False,
+                razorpay_order_id__isnull=False,
+                created_at__gte=now - timedelta(days=options["days"]),
+                created_at__lte=now - timedelta(minutes=options["min_age_minutes"]),
+            )
+            .exclude(razorpay_order_id="")
+            .only("id", "user_id", "amount", "razorpay_order_id", "created_at")
+            .order_by("created_at", "id")
+        )
+
+        checked = credited = 0
+        counts = {}
+        last = None
+        while True:
+            # Keyset pagination: orders paid along the way don't shift pages
+            page = orders
+            if last is not None:
+                page = page.filter(
+                    Q(created_at__gt=last.created_at)
+                    | Q(created_at=last.created_at, id__gt=last.id)
+                )
+            batch = list(page[: options["batch_size"]])
+            if not batch:
+                break
+            last = batch[-1]
+            checked += len(batch)
+
+            paid, report = reconcile.reconcile_batch(
+                batch, workers, dry_run=options["dry_run"]
+            )
+            credited += len(paid)
+            for order, kind, detail in report:
+                counts[kind] = counts.get(kind, 0) + 1
+                self.stdout.write(
+                    f"{kind:8} order={order.id} razorpay={order.razorpay_order_id} "
+                    f"{detail}"
+                )
+
+        self.stdout.write(
+            f"checked {checked} unpaid orders: "
+            f"{counts.get('paid', 0)} paid at Razorpay "
+            f"({credited} marked paid{' - dry run' if options['dry_run'] else ''}), "
+            f"{counts.get('amount', 0)} amount mismatches, "
+            f"{counts.get('missing', 0)} unknown to Razorpay, "
+            f"{counts.get('error', 0)} errors"
+        )
@@ -38,3 +38,36 @@ class Order(models.Model):
         db_table = "subscriptions_orders"
         ordering = ["-created_at"]
         indexes = [models.Index(fields=["user"])]
+
+
+class WebhookEvent(models.Model):
+    """
+    A verified Razorpay webhook delivery, stored before it is acted on.
+    Razorpay retries deliveries, so the event id is unique: a retry is a
+    no-op insert. process_razorpay_webhooks applies pending events.
+    """
+
+    PENDING = "pending"
+    PROCESSED = "processed"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSED, "Processed"),
+        (FAILED, "Failed"),
+    ]
+
+    event_id = models.CharField(max_length=64, unique=True)
+    event = models.CharField(max_length=64)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "razorpay_webhook_events"
+        indexes = [models.Index(fields=["status", "received_at"])]
+
+    def __str__(self):
+        return f"{self.event_id} | {self.event} | {self.status}"
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.subscription_logic import plan_catalog
+
+from .models import SubscriptionPlan
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+@receiver(post_delete, sender=SubscriptionPlan)
+def invalidate_plan_catalog(sender, **kwargs):
+    plan_catalog.invalidate()
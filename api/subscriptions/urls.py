@@ -5,12 +5,14 @@ from .views import (
     RazorpayWebhookView,
     SubscriptionPlanListView,
     VerifyPaymentView,
+    WebhookInboxStatsView,
 )
 
 urlpatterns = [
     path("create-order", CreateOrderView.as_view(), name="create-order"),
     path("verify-payment", VerifyPaymentView.as_view(), name="verify-payment"),
     path("webhook/razorpay", RazorpayWebhookView.as_view(), name="webhook-razorpay"),
+    path("webhook-stats", WebhookInboxStatsView.as_view(), name="webhook-stats"),
     path(
         "get-subscription-plans",
         SubscriptionPlanListView.as_view(),
@@ -1,34 +1,41 @@
-import hashlib
-import hmac
-import json
 import logging
 
 import razorpay
 from django.conf import settings
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from utils.subscription_logic.main import activate_subscription
+from utils.db_logic.replica_router import ReplicaReadMixin
+from utils.subscription_logic import plan_catalog, razorpay_client, webhooks
+from utils.subscription_logic.main import mark_order_paid
 
-from .models import Order, SubscriptionPlan
-from .serializers import SubscriptionPlanSerializer
+from .models import Order
 
 logger = logging.getLogger(__name__)
 
 
-class SubscriptionPlanListView(APIView):
-    """Public API to list all available subscription plans."""
+class SubscriptionPlanListView(ReplicaReadMixin, APIView):
+    """
+    Public API to list all available subscription plans, served from the
+    in-process plan catalog with a strong ETag; revalidations get a 304.
+    """
 
     permission_classes = [AllowAny]
 
     def get(self, request):
-        plans = SubscriptionPlan.objects.all().order_by("token_limit")
-        serializer = SubscriptionPlanSerializer(plans, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        catalog = plan_catalog.get_catalog()
+        response = get_conditional_response(request, etag=catalog.etag)
+        if response is None:
+            response = Response(catalog.data, status=status.HTTP_200_OK)
+        response["ETag"] = catalog.etag
+        patch_cache_control(
+            response, public=True, max_age=settings.PLAN_CATALOG_MAX_AGE
+        )
+        return response
 
 
 class CreateOrderView(APIView):
@@ -37,11 +44,11 @@ class CreateOrderView(APIView):
     def post(self, request):
         # amount = request.data.get("amount")  # in rupees
         plan_id = request.data.get("plan_id")  # from frontend
-        plan = get_object_or_404(SubscriptionPlan, id=plan_id)
+        plan = plan_catalog.get_plan(plan_id)
+        if plan is None:
+            raise Http404("No SubscriptionPlan matches the given query.")
 
-        client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
+        client = razorpay_client.get_client()
 
         razorpay_order = client.order.create(
             {
@@ -51,8 +58,10 @@ class CreateOrderView(APIView):
             }
         )
         logger.info("Razor pay oder: %s", razorpay_order)
-        fetch_razorpay_order = client.order.fetch(razorpay_order["id"])
-        logger.info("Fetched razor pay order: %s", fetch_razorpay_order)
+        if settings.RAZORPAY_FETCH_ORDER:
+            # Debug aid only: costs a second round-trip to Razorpay per checkout
+            fetch_razorpay_order = client.order.fetch(razorpay_order["id"])
+            logger.info("Fetched razor pay order: %s", fetch_razorpay_order)
 
         order = Order.objects.create(
             user=request.user,
@@ -78,9 +87,7 @@ class VerifyPaymentView(APIView):
 
     def post(self, request):
         data = request.data
-        client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
+        client = razorpay_client.get_client()
         logger.info("Verifying payment with data: %s", data)
         try:
             client.utility.verify_payment_signature(
@@ -98,64 +105,50 @@ class VerifyPaymentView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            order = Order.objects.get(razorpay_order_id=data["razorpay_order_id"])
-            if not order.is_paid:  # avoid double activation
-                order.is_paid = True
-                order.razorpay_payment_id = data["razorpay_payment_id"]
-                order.save()
-
-                # ✅ Activate tokens on webhook too
-                activate_subscription(order)
-
-        except Order.DoesNotExist:
-            pass
-        logger.info("Order updated successfully: %s", order)
+        # Races with the webhook for the same order; only one of them credits
+        order = mark_order_paid(data["razorpay_order_id"], data["razorpay_payment_id"])
+        if order is not None:
+            logger.info("Order updated successfully: %s", order)
         return Response({"status": "success"})
 
 
 class RazorpayWebhookView(APIView):
+    """
+    Razorpay webhook endpoint: verify the signature, store the event in the
+    inbox and answer 200 straight away. Crediting happens in the
+    process_razorpay_webhooks worker (which must be running, see
+    WebhookInboxStatsView), exactly once per order.
+    """
+
     authentication_classes = []
     permission_classes = []
 
     def post(self, request):
-        webhook_secret = settings.RAZORPAY_WEBHOOK_SECRET
-        received_sig = request.headers.get("X-Razorpay-Signature")
-        body = request.body.decode("utf-8")
-        logger.info("received the signature %s", received_sig)
-        logger.info("request body: %s", body)
-        # Verify signature
-        generated_sig = hmac.new(
-            webhook_secret.encode(), body.encode(), hashlib.sha256
-        ).hexdigest()
-
-        logger.info("generate signature: %s", generated_sig)
-        if not hmac.compare_digest(received_sig, generated_sig):
-            logger.error("Invalid signature")
+        body = request.body
+        if not webhooks.verify_signature(
+            body,
+            request.headers.get("X-Razorpay-Signature"),
+            settings.RAZORPAY_WEBHOOK_SECRET,
+        ):
+            logger.error("Invalid webhook signature")
             return HttpResponse(status=400)  # Invalid signature
 
-        event = json.loads(body)
-        event_type = event.get("event")
-        logger.info("event captured: %s", event_type)
-
-        if event_type == "payment.captured":
-            payment = event["payload"]["payment"]["entity"]
-            logger.info("payment obj: %s", payment)
-            razorpay_order_id = payment.get("order_id")
-            razorpay_payment_id = payment.get("id")
+        event_id = request.headers.get("X-Razorpay-Event-Id")
+        try:
+            event = webhooks.record(body, event_id)
+        except ValueError:
+            return HttpResponse(status=400)
+        logger.info("Webhook %s queued: %s", event_id, event.get("event"))
+        return HttpResponse(status=200)
 
-            try:
-                order = Order.objects.get(razorpay_order_id=razorpay_order_id)
-                if not order.is_paid:  # avoid double activation
-                    order.is_paid = True
-                    order.razorpay_payment_id = razorpay_payment_id
-                    order.save()
 
-                    # ✅ Activate tokens on webhook too
-                    activate_subscription(order)
+class WebhookInboxStatsView(APIView):
+    """
+    Staff-only view of the webhook inbox: pending events and the age of the
+    oldest, so a stopped process_razorpay_webhooks worker shows up.
+    """
 
-            except Order.DoesNotExist:
-                pass
+    permission_classes = [IsAdminUser]
 
-        logger.info("successful")
-        return HttpResponse(status=200)
+    def get(self, request):
+        return Response(webhooks.inbox_snapshot(), status=status.HTTP_200_OK)
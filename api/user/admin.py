@@ -3,4 +3,4 @@ from django.contrib import admin
 from . import models
 
 # Register your models here.
-admin.site.register([models.User, models.UserCredit])
+admin.site.register([models.User, models.UserCredit, models.OutboxEmail])
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.mail_logic import outbox
+
+# Seconds between two prunes of old emails (with --loop)
+PRUNE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued emails (activation, password reset, contact notifications) "
+        "in batches over one SMTP connection. Run it with --loop as a worker "
+        "process, or without to drain the outbox once (e.g. from cron). Sent "
+        "and failed emails past EMAIL_OUTBOX_RETENTION_DAYS are deleted on "
+        "start and hourly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new emails"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the outbox is empty (with --loop)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pruned_at = 0
+        while True:
+            if time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                pruned = outbox.prune()
+                pruned_at = time.monotonic()
+                if pruned:
+                    self.stdout.write(f"pruned {pruned} old emails")
+            sent, failed = outbox.send_batch(batch_size)
+            if sent or failed:
+                self.stdout.write(f"sent {sent}, failed {failed}")
+            if sent + failed < batch_size:
+                # Outbox drained (what is left waits for its retry time)
+                if not options["loop"]:
+                    return
+                time.sleep(options["interval"])
@@ -26,6 +26,10 @@ class Gender(Enum):
         return [(i.name, i.value) for i in cls]
 
 
+# Changing any of these invalidates the user's tokens
+TOKEN_CLAIM_FIELDS = ("password", "is_active", "is_staff")
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     first_name = models.CharField(max_length=30)
@@ -48,6 +52,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_superuser = models.BooleanField(default=False)  # Required for permissions
     email_verified = models.BooleanField(default=False)
     is_verified = models.BooleanField(default=False)
+    # Signed into every JWT; bumped to revoke the tokens issued before
+    token_version = models.PositiveIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -66,8 +72,47 @@ class User(AbstractBaseUser, PermissionsMixin):
         self.is_verified = self.email_verified
         if self.is_superuser or self.is_staff:
             self.is_active = True  # Always active for admins
+        update_fields = kwargs.get("update_fields")
+        if self._sync_token_version(update_fields) and update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "token_version"}
         super().save(*args, **kwargs)
 
+    def _sync_token_version(self, update_fields):
+        """
+        Tokens carry is_active and is_staff, and stay valid across password
+        changes unless revoked: bump token_version when any of those change.
+        Also picks up a revocation made since this instance was loaded.
+        """
+        if self._state.adding:
+            return False
+        fields = [
+            f for f in TOKEN_CLAIM_FIELDS if update_fields is None or f in update_fields
+        ]
+        if not fields:
+            return False
+        current = (
+            type(self)
+            ._base_manager.using("default")
+            .filter(pk=self.pk)
+            .values("token_version", *fields)
+            .first()
+        )
+        if current is None:
+            return False
+        changed = any(current[f] != getattr(self, f) for f in fields)
+        self.token_version = current["token_version"] + changed
+        return changed
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Users built from token claims (see utils/auth/stateless_jwt.py) defer
+        # every other field: load all of them on first access, in one query.
+        if fields is not None:
+            fields = set(fields)
+            deferred = self.get_deferred_fields()
+            if fields & deferred:
+                fields |= deferred
+        super().refresh_from_db(using, fields, from_queryset)
+
     def __str__(self):
         return f"{self.email} - {self.first_name} {self.last_name} | last login: {self.last_login}"
 
@@ -84,3 +129,47 @@ class UserCredit(models.Model):
 
     def __str__(self):
         return f"{self.user.email} | remaining tokens : {self.remaining_tokens} | {self.last_updated}"
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent by the send_email_outbox worker. Requests only
+    insert a row; rendering and SMTP happen in the worker (utils.mail_logic).
+    Sent rows lose their context and body (tokens, messages) and are deleted
+    after EMAIL_OUTBOX_RETENTION_DAYS.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    to = models.EmailField()
+    subject = models.CharField(max_length=200)
+    # HTML template under utils/render_files rendered with `context`, or blank
+    # for a plain-text email whose text is `body`
+    template = models.CharField(max_length=100, blank=True)
+    context = models.JSONField(default=dict, blank=True)
+    body = models.TextField(blank=True)
+    # template:recipient:window; a second email in the same window is dropped
+    dedupe_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # While sending: when the worker's claim lapses and another may retry it
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "email_outbox"
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.to} | {self.subject} | {self.status}"
@@ -5,12 +5,11 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import (
-    AccessToken,
-    RefreshToken,
-)
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import AccessToken
 
 from utils.auth.forgot_password import send_password_reset_email
+from utils.auth.stateless_jwt import ClaimsRefreshToken
 
 from .models import UserCredit
 
@@ -100,7 +99,7 @@ class EmailLoginSerializer(serializers.Serializer):
             )
 
         # 4) If all good, create JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         access = refresh.access_token
         access.set_exp(lifetime=timedelta(days=1))
         name = user.first_name + " " + user.last_name if user.last_name else ""
@@ -204,3 +203,7 @@ class UserCreditSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserCredit
         fields = ["total_tokens", "used_tokens", "remaining_tokens", "last_updated"]
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.auth import stateless_jwt
+
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def remember_token_version(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or "token_version" in update_fields:
+        stateless_jwt.remember_version(instance.pk, instance.token_version)
+
+
+@receiver(post_delete, sender=User)
+def forget_token_version(sender, instance, **kwargs):
+    stateless_jwt.remember_version(instance.pk, None)
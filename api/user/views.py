@@ -1,8 +1,6 @@
 from datetime import timedelta
 
 from django.utils import timezone
-from google.auth.transport import requests
-from google.oauth2 import id_token as google_id_token
 from rest_framework import permissions, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView
@@ -10,10 +8,12 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken
 
-from campused.settings import GOOGLE_CLIENT_ID
+from utils.auth import google_auth
 from utils.auth.account_activation import send_activation_email
+from utils.auth.stateless_jwt import ClaimsRefreshToken
+from utils.db_logic.replica_router import ReplicaReadMixin
 
 from .models import Provider, User, UserCredit
 from .serializers import (
@@ -200,7 +200,6 @@ class GoogleAuthView(GenericAPIView):
 
     def post(self, request, *args, **kwargs):
         id_token_value = request.data.get("id_token")
-        print("ID Token:", id_token_value)
         if not id_token_value:
             return Response(
                 {"message": "Google ID token is required.", "status": False},
@@ -209,10 +208,7 @@ class GoogleAuthView(GenericAPIView):
 
         try:
             # Verify and decode the token
-            idinfo = google_id_token.verify_oauth2_token(
-                id_token_value, requests.Request(), GOOGLE_CLIENT_ID
-            )
-            print("ID Info:", idinfo)
+            idinfo = google_auth.verify_id_token(id_token_value)
             email = idinfo.get("email")
             name = idinfo.get("name")
             email_verified = idinfo.get("email_verified", False)
@@ -249,7 +245,7 @@ class GoogleAuthView(GenericAPIView):
                 user.save(update_fields=["email_verified"])
 
             # Build a new RefreshToken for this user
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             access_token_str = str(refresh.access_token)
             name = user.first_name + " " + user.last_name if user.last_name else ""
             return Response(
@@ -262,7 +258,7 @@ class GoogleAuthView(GenericAPIView):
             )
 
         except ValueError as e:
-            # Raised by google_id_token.verify_oauth2_token on invalid/expired token
+            # Raised by google_auth.verify_id_token on invalid/expired token
             return Response(
                 {
                     "message": "Invalid Google ID token.",
@@ -328,7 +324,7 @@ class ResetPasswordAPIView(GenericAPIView):
         )
 
 
-class UserCreditView(APIView):
+class UserCreditView(ReplicaReadMixin, APIView):
     """
     Fetch the user's current token credit details.
     """
@@ -337,7 +333,10 @@ class UserCreditView(APIView):
 
     def get(self, request):
         user = request.user
-        credit, _ = UserCredit.objects.get_or_create(user=user)
+        # Read (replica) first; only users without a credit row need a write
+        credit = UserCredit.objects.filter(user=user).first()
+        if credit is None:
+            credit, _ = UserCredit.objects.get_or_create(user=user)
 
         serializer = UserCreditSerializer(credit)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -57,12 +57,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.channel.middleware.compression_middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "api.channel.middleware.token_usage_middleware.TokenUsageMiddleware",
+    "api.channel.middleware.replica_stickiness_middleware.ReplicaStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -86,6 +88,7 @@ CORS_ALLOW_HEADERS = [
 
 CORS_EXPOSE_HEADERS = [
     "x-user-remaining-tokens",
+    "x-prompt-cache-hit-rate",
 ]
 
 SIMPLE_JWT = {
@@ -101,14 +104,34 @@ SIMPLE_JWT = {
     "ISSUER": None,
     "JWK_URL": None,
     "LEEWAY": 0,
+    "TOKEN_OBTAIN_SERIALIZER": "api.user.serializers.ClaimsTokenObtainPairSerializer",
 }
+# Tokens carry is_active/is_staff and a version stamp, so authentication needs
+# no user row; the current version per user is cached this long (seconds),
+# bounding how long a revoked token can still be accepted. Only a cache shared
+# by all processes (Redis, memcached) is used; with the default per-process
+# cache the version is read from the database on every request.
+JWT_VERSION_CACHE_SECONDS = env.int("JWT_VERSION_CACHE_SECONDS", default=5)
+
+# orjson for API bodies and conversation JSONFields; False forces stdlib json
+FAST_JSON = env.bool("FAST_JSON", default=True)
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "utils.auth.stateless_jwt.StatelessJWTAuthentication",
         # 'rest_framework.authentication.SessionAuthentication', # Optional
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # orjson-backed unless FAST_JSON is off (see utils/json_logic/fast_json.py)
+    "DEFAULT_RENDERER_CLASSES": (
+        "utils.json_logic.fast_json.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "utils.json_logic.fast_json.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 # Password validation
@@ -157,6 +180,48 @@ db_string = runtime + "_DATABASE_URL"
 DATABASES = {
     "default": env.db(db_string),  # reads DATABASE_URL
 }
+# Connection reuse. By default each worker thread keeps its connection for
+# DB_CONN_MAX_AGE seconds (0 = close after every request) and checks it
+# before reuse, so a dropped connection is replaced transparently.
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = env.bool(
+    "DB_CONN_HEALTH_CHECKS", default=True
+)
+DATABASES["default"]["CONN_MAX_AGE"] = env.int("DB_CONN_MAX_AGE", default=60)
+# DB_POOL=True switches PostgreSQL to psycopg 3's native pool (needs
+# psycopg[pool] installed; ignored for other databases); connections are then
+# shared by all threads of a process, so CONN_MAX_AGE must be 0.
+if (
+    env.bool("DB_POOL", default=False)
+    and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql"
+):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+        "max_size": env.int("DB_POOL_MAX_SIZE", default=10),
+        # seconds a request waits for a free connection before failing
+        "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+        "max_idle": env.float("DB_POOL_MAX_IDLE", default=600.0),
+        "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=3600.0),
+    }
+
+# Optional read replicas: comma separated URLs in <RUNTIME>_REPLICA_DATABASE_URLS.
+# Only views using ReplicaReadMixin read from them; a user who just wrote reads
+# from the primary for REPLICA_STICKY_SECONDS. Stickiness lives in the Django
+# cache and needs one shared by all processes (Redis, memcached): with the
+# default per-process cache, signed-in users always read from the primary.
+for index, url in enumerate(env.list(runtime + "_REPLICA_DATABASE_URLS", default=[])):
+    replica = environ.Env.db_url_config(url)
+    replica["CONN_MAX_AGE"] = DATABASES["default"]["CONN_MAX_AGE"]
+    replica["CONN_HEALTH_CHECKS"] = DATABASES["default"]["CONN_HEALTH_CHECKS"]
+    replica["OPTIONS"] = {
+        **DATABASES["default"].get("OPTIONS", {}),
+        **replica.get("OPTIONS", {}),
+    }
+    replica["TEST"] = {"MIRROR": "default"}
+    DATABASES[f"replica{index}"] = replica
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=15)
+DATABASE_ROUTERS = ["utils.db_logic.replica_router.ReplicaRouter"]
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -176,33 +241,130 @@ USE_TZ = True
 STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# How FileFetchView serves attachments: "django" (FileResponse, dev),
+# "x-accel" (nginx X-Accel-Redirect) or "x-sendfile" (Apache/lighttpd)
+FILE_SERVE_MODE = env("FILE_SERVE_MODE", default="django")
+FILE_SERVE_INTERNAL_URL = env("FILE_SERVE_INTERNAL_URL", default="/protected-media/")
+# Browser cache lifetime (seconds) for attachments; saved names are never reused
+FILE_CACHE_MAX_AGE = env.int("FILE_CACHE_MAX_AGE", default=86400)
+# Upload limits (bytes); oversized uploads are cut off while being received
+MAX_UPLOAD_FILE_SIZE = env.int("MAX_UPLOAD_FILE_SIZE", default=20 * 1024 * 1024)
+MAX_UPLOAD_REQUEST_SIZE = env.int("MAX_UPLOAD_REQUEST_SIZE", default=50 * 1024 * 1024)
+# Document extraction budget per upload; pages past it are left for later turns
+DOCUMENT_MAX_PAGES = env.int("DOCUMENT_MAX_PAGES", default=30)
+DOCUMENT_MAX_TOKENS = env.int("DOCUMENT_MAX_TOKENS", default=20000)
+# Size of the process pool used for extraction (0 = extract in the request worker)
+DOCUMENT_EXTRACT_WORKERS = env.int("DOCUMENT_EXTRACT_WORKERS", default=0)
+# Retrieval over uploaded documents: each turn gets the top-k chunks instead of
+# the whole text (0 = inline the text within the budget above). Uploads index
+# the pages within that budget; the rest, up to DOCUMENT_INDEX_MAX_PAGES, is
+# indexed by the `manage.py index_documents --loop` worker.
+DOCUMENT_RETRIEVAL_TOP_K = env.int("DOCUMENT_RETRIEVAL_TOP_K", default=5)
+DOCUMENT_RETRIEVAL_MAX_TOKENS = env.int("DOCUMENT_RETRIEVAL_MAX_TOKENS", default=2000)
+DOCUMENT_INDEX_MAX_PAGES = env.int("DOCUMENT_INDEX_MAX_PAGES", default=1000)
+# Memory for the per-process cache of channel search indexes (estimated)
+DOCUMENT_INDEX_CACHE_MB = env.int("DOCUMENT_INDEX_CACHE_MB", default=64)
+# PostgreSQL text search configuration for channel/exam search; "simple" does
+# no stemming, so it works for every exam language
+SEARCH_CONFIG = env("SEARCH_CONFIG", default="simple")
+# Response compression (br/zstd when installed, else gzip) for JSON under
+# these path prefixes, above this size in bytes
+COMPRESSION_PATHS = env.list("COMPRESSION_PATHS", default=["/api/channel/"])
+COMPRESSION_MIN_SIZE = env.int("COMPRESSION_MIN_SIZE", default=1024)
+
+# Admission control for the LLM-backed endpoints (chat, exam generation):
+# a per-user token bucket (0 disables), a per-user in-flight limit ("local"
+# per process, or "cache" to share it through the Django cache across nodes)
+# and a per-process cap on concurrent requests, with a bounded wait queue.
+LLM_RATE_PER_MINUTE = env.float("LLM_RATE_PER_MINUTE", default=20)
+LLM_RATE_BURST = env.int("LLM_RATE_BURST", default=5)
+LLM_USER_MAX_INFLIGHT = env.int("LLM_USER_MAX_INFLIGHT", default=2)
+LLM_INFLIGHT_BACKEND = env("LLM_INFLIGHT_BACKEND", default="local")
+LLM_INFLIGHT_TTL = env.int("LLM_INFLIGHT_TTL", default=300)
+LLM_MAX_CONCURRENCY = env.int("LLM_MAX_CONCURRENCY", default=8)
+LLM_QUEUE_MAX = env.int("LLM_QUEUE_MAX", default=16)
+LLM_QUEUE_TIMEOUT = env.float("LLM_QUEUE_TIMEOUT", default=5)
 
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_HOST = "smtp.gmail.com"
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_BACKEND = env(
+    "EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
+# Point these at a local sink (e.g. EMAIL_HOST=localhost EMAIL_PORT=1025
+# EMAIL_USE_TLS=False with aiosmtpd or mailpit) to test delivery
+EMAIL_HOST = env("EMAIL_HOST", default="smtp.gmail.com")
+EMAIL_PORT = env.int("EMAIL_PORT", default=587)
+EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=True)
+EMAIL_TIMEOUT = env.int("EMAIL_TIMEOUT", default=20)
 EMAIL_HOST_USER = env("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 CONTACT_NOTIFICATION_EMAIL = env("CONTACT_NOTIFICATION_EMAIL")
+# Email outbox (sent by `manage.py send_email_outbox`): the same template and
+# recipient is sent once per dedupe window; failures back off exponentially
+EMAIL_DEDUPE_SECONDS = env.int("EMAIL_DEDUPE_SECONDS", default=60)
+EMAIL_MAX_ATTEMPTS = env.int("EMAIL_MAX_ATTEMPTS", default=6)
+EMAIL_RETRY_BASE_SECONDS = env.int("EMAIL_RETRY_BASE_SECONDS", default=30)
+# Sent and failed emails are deleted by the worker after this many days (0 keeps them)
+EMAIL_OUTBOX_RETENTION_DAYS = env.int("EMAIL_OUTBOX_RETENTION_DAYS", default=7)
 
 # Google client ID
 GOOGLE_CLIENT_ID = env("GOOGLE_CLIENT_ID")
+# Google ID-token verification: the signing certs are cached for their
+# max-age; verified tokens are memoized briefly (0 disables). Tests can point
+# GOOGLE_CERTS_URL at local certs or swap GOOGLE_TOKEN_VERIFIER for a stub.
+GOOGLE_CERTS_URL = env(
+    "GOOGLE_CERTS_URL", default="https://www.googleapis.com/oauth2/v1/certs"
+)
+GOOGLE_TOKEN_MEMO_SECONDS = env.int("GOOGLE_TOKEN_MEMO_SECONDS", default=60)
+GOOGLE_TOKEN_VERIFIER = env(
+    "GOOGLE_TOKEN_VERIFIER", default="utils.auth.google_auth.GoogleTokenVerifier"
+)
 
 # OPENAI API KEY
 OPENAI_API_KEY = env("OPENAI_API_KEY")
 OPENAI_MODEL = env("OPENAI_MODEL")
+# Override to point at a proxy or the offline stand-in (manage.py fake_openai)
+OPENAI_BASE_URL = env("OPENAI_BASE_URL", default=None)
+# Ordered model candidates per task: first is preferred, the rest are fallbacks
+# when the preferred model is overloaded (see utils/openai_logic/model_router.py)
+OPENAI_MODEL_POLICIES = {
+    "title": env.list("OPENAI_TITLE_MODELS", default=["gpt-4.1-nano", "gpt-4o-mini"]),
+    "chat": env.list("OPENAI_CHAT_MODELS", default=[OPENAI_MODEL, "gpt-4o-mini"]),
+    "vision": env.list("OPENAI_VISION_MODELS", default=["gpt-4.1-mini", "gpt-4o-mini"]),
+    "exam": env.list("OPENAI_EXAM_MODELS", default=["gpt-4o-mini", "gpt-4.1-nano"]),
+}
 
 # Razorpay Keys
 RAZORPAY_KEY_ID = env("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = env("RAZORPAY_KEY_SECRET")
 RAZORPAY_WEBHOOK_SECRET = env("RAZORPAY_WEBHOOK_SECRET")
+# Webhooks are only stored by the endpoint; orders are credited by a worker
+# that must run next to the web processes:
+#   manage.py process_razorpay_webhooks --loop
+# The staff webhook-stats view reports the inbox as stalled once its oldest
+# pending event is older than this many seconds
+RAZORPAY_WEBHOOK_MAX_LAG_SECONDS = env.int(
+    "RAZORPAY_WEBHOOK_MAX_LAG_SECONDS", default=300
+)
+# Override to point at the offline stand-in (manage.py fake_razorpay)
+RAZORPAY_BASE_URL = env("RAZORPAY_BASE_URL", default=None)
+# Shared client session: timeouts (seconds), retries and pooled connections
+RAZORPAY_CONNECT_TIMEOUT = env.float("RAZORPAY_CONNECT_TIMEOUT", default=3.05)
+RAZORPAY_READ_TIMEOUT = env.float("RAZORPAY_READ_TIMEOUT", default=10)
+RAZORPAY_MAX_RETRIES = env.int("RAZORPAY_MAX_RETRIES", default=2)
+RAZORPAY_POOL_SIZE = env.int("RAZORPAY_POOL_SIZE", default=10)
+# Re-fetch each new order for the logs (one extra round-trip per checkout)
+RAZORPAY_FETCH_ORDER = env.bool("RAZORPAY_FETCH_ORDER", default=False)
+# Plan catalog: in-process reload interval, and how long clients may cache the
+# plan list (seconds). Plan edits reach other processes at once only through a
+# shared cache (Redis, memcached); otherwise they wait for this interval.
+PLAN_CATALOG_TTL = env.int("PLAN_CATALOG_TTL", default=60)
+PLAN_CATALOG_MAX_AGE = env.int("PLAN_CATALOG_MAX_AGE", default=300)
 # Frontend URL
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:4200")
 
@@ -13,7 +13,7 @@ from .send_html_email import _send_html_email
 def send_activation_email(user, request):
     """
     Generate a 1-day JWT (with user_id), build activation URL,
-    then call _send_html_email(...) to deliver the “Activate Account” email.
+    then call _send_html_email(...) to queue the “Activate Account” email.
     """
     # 1) Create a 1-day JWT for this user
     token = AccessToken.for_user(user)
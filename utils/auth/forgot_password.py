@@ -11,7 +11,7 @@ from .send_html_email import _send_html_email
 def send_password_reset_email(user, request):
     """
     Generate a 1-hour “password_reset” JWT, build reset URL,
-    then call _send_html_email(...) to send the “Reset Password” email.
+    then call _send_html_email(...) to queue the “Reset Password” email.
     """
     # 1) Create a 1-hour JWT and mark it with a custom claim
     token = AccessToken.for_user(user)
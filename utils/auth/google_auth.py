@@ -0,0 +1,165 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from google.auth import jwt
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+# Used when the certs response carries no max-age
+DEFAULT_CERTS_MAX_AGE = 300
+# Unknown key ids refetch the certs at most this often (seconds)
+MIN_CERTS_REFRESH = 60
+MEMO_MAX_ENTRIES = 10000
+
+_max_age = re.compile(r"max-age=(\d+)")
+
+
+class GoogleTokenVerifier:
+    """
+    Verifies Google ID tokens against Google's signing certs.
+
+    The certs are fetched over one shared session and kept for the max-age
+    Google sends (hours), refetched early when a token names a key id they
+    don't have (key rotation), but at most once per MIN_CERTS_REFRESH: in
+    between, tokens with unknown key ids are rejected without a fetch or the
+    lock, so garbage tokens cannot make every login wait on Google. Verified
+    tokens are memoized by hash for GOOGLE_TOKEN_MEMO_SECONDS (never past
+    their exp), so a client retrying a login costs no signature check.
+    """
+
+    def __init__(
+        self,
+        client_id,
+        certs_url,
+        session=None,
+        memo_seconds=60,
+        min_refresh_seconds=MIN_CERTS_REFRESH,
+    ):
+        self.client_id = client_id
+        self.certs_url = certs_url
+        self.session = session or requests.Session()
+        self.memo_seconds = memo_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self._lock = threading.Lock()
+        self._certs = None
+        self._certs_expire = 0.0
+        self._fetched_at = float("-inf")  # last fetch attempt
+        self._memo = OrderedDict()  # sha256(token) -> (expires, idinfo)
+        self._memo_lock = threading.Lock()
+
+    def _fetch_certs(self):
+        self._fetched_at = time.monotonic()
+        response = self.session.get(self.certs_url, timeout=(3.05, 5))
+        response.raise_for_status()
+        match = _max_age.search(response.headers.get("Cache-Control", ""))
+        max_age = int(match.group(1)) if match else DEFAULT_CERTS_MAX_AGE
+        self._certs = response.json()
+        self._certs_expire = time.monotonic() + max_age
+
+    def _may_refresh(self):
+        return time.monotonic() - self._fetched_at >= self.min_refresh_seconds
+
+    def certs(self, refresh=False):
+        """
+        The current certs. `refresh` refetches them unless they were fetched
+        less than min_refresh_seconds ago.
+        """
+        refresh = refresh and self._may_refresh()
+        if refresh or self._certs is None or time.monotonic() >= self._certs_expire:
+            with self._lock:
+                if (
+                    (refresh and self._may_refresh())
+                    or self._certs is None
+                    or time.monotonic() >= self._certs_expire
+                ):
+                    try:
+                        self._fetch_certs()
+                    except (requests.RequestException, ValueError):
+                        # Google unreachable: keep using the certs we have,
+                        # and only try again in a minute
+                        if self._certs is None:
+                            raise
+                        self._certs_expire = time.monotonic() + 60
+        return self._certs
+
+    def _memo_get(self, key):
+        with self._memo_lock:
+            entry = self._memo.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._memo[key]
+                return None
+            return entry[1]
+
+    def _memo_set(self, key, idinfo):
+        expires = min(time.time() + self.memo_seconds, idinfo.get("exp", 0))
+        with self._memo_lock:
+            self._memo[key] = (expires, idinfo)
+            self._memo.move_to_end(key)
+            while len(self._memo) > MEMO_MAX_ENTRIES:
+                self._memo.popitem(last=False)
+
+    def verify(self, token):
+        """
+        The decoded claims of a valid ID token issued by Google for our
+        client id. Raises ValueError for any invalid, expired or foreign token.
+        """
+        if isinstance(token, bytes):
+            token = token.decode("utf-8")
+        key = hashlib.sha256(token.encode()).hexdigest()
+        idinfo = self._memo_get(key) if self.memo_seconds > 0 else None
+        if idinfo is not None:
+            return idinfo
+
+        certs = self.certs()
+        kid = jwt.decode_header(token).get("kid")
+        if kid not in certs:
+            certs = self.certs(refresh=True)
+            if kid not in certs:
+                raise ValueError(f"Certificate for key id {kid} not found.")
+        idinfo = jwt.decode(token, certs=certs, audience=self.client_id)
+        if idinfo.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer. 'iss' should be one of {GOOGLE_ISSUERS}")
+
+        if self.memo_seconds > 0:
+            self._memo_set(key, idinfo)
+        return idinfo
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    """
+    The process-wide verifier: an instance of settings.GOOGLE_TOKEN_VERIFIER
+    (GoogleTokenVerifier unless replaced, e.g. by a stub in offline tests),
+    unless set_verifier() installed one.
+    """
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                verifier_class = import_string(settings.GOOGLE_TOKEN_VERIFIER)
+                _verifier = verifier_class(
+                    client_id=settings.GOOGLE_CLIENT_ID,
+                    certs_url=settings.GOOGLE_CERTS_URL,
+                    memo_seconds=settings.GOOGLE_TOKEN_MEMO_SECONDS,
+                )
+    return _verifier
+
+
+def set_verifier(verifier):
+    """Install `verifier` (anything with .verify(token)); None restores the default."""
+    global _verifier
+    _verifier = verifier
+
+
+def verify_id_token(token):
+    return get_verifier().verify(token)
@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from utils.cache_logic.shared_cache import shared_cache
+
+VERSION_CLAIM = "ver"
+# Claims the authentication trusts instead of reading the user row
+USER_CLAIMS = ("is_active", "is_staff")
+# Cached for ids with no user, so deleted users don't cost a query per request
+MISSING = -1
+
+
+def _version_key(user_id):
+    return f"jwt-version:{user_id}"
+
+
+def claims_for(user):
+    claims = {claim: getattr(user, claim) for claim in USER_CLAIMS}
+    claims[VERSION_CLAIM] = user.token_version
+    return claims
+
+
+class ClaimsAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in claims_for(user).items():
+            token[claim] = value
+        return token
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """A refresh token whose access tokens (copied claims) carry claims_for(user)."""
+
+    access_token_class = ClaimsAccessToken
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in claims_for(user).items():
+            token[claim] = value
+        return token
+
+
+def remember_version(user_id, version):
+    cache = shared_cache()
+    if cache is None:
+        return
+    cache.set(
+        _version_key(user_id),
+        MISSING if version is None else version,
+        settings.JWT_VERSION_CACHE_SECONDS,
+    )
+
+
+def current_version(user_id):
+    """
+    The user's token_version (MISSING if there is no such user), cached in a
+    shared cache and read from the database on every call without one.
+    """
+    cache = shared_cache()
+    version = cache.get(_version_key(user_id)) if cache is not None else None
+    if version is None:
+        User = get_user_model()
+        version = (
+            User._base_manager.using("default")
+            .filter(pk=user_id)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        remember_version(user_id, version)
+        version = MISSING if version is None else version
+    return version
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to `user` so far (sign out everywhere)."""
+    User = get_user_model()
+    User.objects.filter(pk=user.pk).update(token_version=F("token_version") + 1)
+    user.token_version = (
+        User.objects.filter(pk=user.pk).values_list("token_version", flat=True).get()
+    )
+    remember_version(user.pk, user.token_version)
+
+
+def lazy_user(validated_token):
+    """
+    A User built from the token's claims alone. Its other fields are deferred:
+    the first access to any of them loads the row (in one query).
+    """
+    User = get_user_model()
+    values = {
+        User._meta.pk.attname: User._meta.pk.to_python(
+            validated_token[api_settings.USER_ID_CLAIM]
+        ),
+        "token_version": validated_token[VERSION_CLAIM],
+        **{claim: validated_token[claim] for claim in USER_CLAIMS},
+    }
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db("default", field_names, [values[f] for f in field_names])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the user query: tokens carrying claims_for()
+    are trusted as long as their version stamp matches the user's current
+    token_version. With a shared cache the version is cached for
+    JWT_VERSION_CACHE_SECONDS and rewritten whenever a user is saved or
+    deleted; with a per-process cache (the default LocMemCache) it is read
+    from the database on each request, a single-column primary-key lookup.
+    Older tokens without the claims still go through the regular lookup.
+    """
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        version = current_version(user_id)
+        if version == MISSING:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if validated_token[VERSION_CLAIM] != version:
+            raise AuthenticationFailed(
+                _("Token has been revoked."), code="token_revoked"
+            )
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return lazy_user(validated_token)
@@ -0,0 +1,17 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def shared_cache():
+    """
+    The default cache if every process sees the same one (Redis, memcached,
+    the database), else None. State other processes must see (revocations,
+    invalidations, read-your-writes pins) only works through a shared cache;
+    with the default per-process LocMemCache callers fall back to something
+    safe instead.
+    """
+    cache = caches["default"]
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        return None
+    return cache
@@ -0,0 +1,52 @@
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_connects = Counter()
+
+
+@receiver(connection_created)
+def count_connect(sender, connection, **kwargs):
+    """Count connections set up per alias (pool checkouts included)."""
+    with _lock:
+        _connects[connection.alias] += 1
+
+
+def _pool_stats(pool):
+    stats = pool.get_stats()
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    maximum = stats.get("pool_max") or pool.max_size
+    return {
+        **stats,
+        "in_use": in_use,
+        # 1.0 = every connection checked out; requests_waiting > 0 = queueing
+        "saturation": round(in_use / maximum, 4) if maximum else 0.0,
+    }
+
+
+def snapshot():
+    """
+    Return {alias: {vendor, conn_max_age, health_checks, connects, pool}} for
+    this process. "pool" holds psycopg_pool's counters plus in_use and
+    saturation when DB_POOL is on, otherwise None; a "connects" count that
+    grows with every request means connections are not being reused.
+    """
+    result = {}
+    for alias in connections:
+        connection = connections[alias]
+        # Look the pool up without creating it (Django builds it lazily)
+        pool = getattr(connection, "_connection_pools", {}).get(alias)
+        with _lock:
+            connects = _connects[alias]
+        result[alias] = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE"),
+            "health_checks": connection.settings_dict.get("CONN_HEALTH_CHECKS"),
+            "connects": connects,
+            "pool": _pool_stats(pool) if pool is not None else None,
+        }
+    return result
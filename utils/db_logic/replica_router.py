@@ -0,0 +1,76 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from utils.cache_logic.shared_cache import shared_cache
+
+# Set while a ReplicaReadMixin view handles a safe request
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def _sticky_key(user_id):
+    return f"db-sticky:{user_id}"
+
+
+def mark_wrote(user):
+    """Pin `user`'s reads to the primary for REPLICA_STICKY_SECONDS."""
+    cache = shared_cache()
+    if cache is not None:
+        cache.set(_sticky_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user):
+    """
+    Whether `user`'s reads must go to the primary. Without a shared cache
+    a write seen by another process cannot be known, so every signed-in
+    user reads from the primary; anonymous requests still use replicas.
+    """
+    if not user.is_authenticated:
+        return False
+    cache = shared_cache()
+    return cache is None or bool(cache.get(_sticky_key(user.pk)))
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random replica, but only inside views that opted in with
+    ReplicaReadMixin; everything else, including all writes and any read
+    made while handling a write, stays on "default".
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and settings.REPLICA_DATABASES:
+            return random.choice(settings.REPLICA_DATABASES)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaReadMixin:
+    """
+    DRF view mixin: safe-method requests read from a replica, unless the user
+    wrote something in the last REPLICA_STICKY_SECONDS (read-your-writes).
+    Stickiness is checked after authentication, so it is per user.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_sticky(request.user):
+            self._replica_token = _use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _use_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,187 @@
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from api.channel.models import DocumentChunk
+from utils.file_logic.file_loader import CHARS_PER_TOKEN
+
+# Chunk size in characters (~300 tokens); paragraphs are never split
+CHUNK_CHARS = 1200
+# BM25 parameters (the usual Okapi defaults)
+K1 = 1.2
+B = 0.75
+# Rough in-memory size of an index: its text, plus this much per entry of
+# the per-chunk term counters
+BYTES_PER_TERM = 70
+
+_WORD = re.compile(r"\w+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were what when where which who why will with".split()
+)
+
+
+def tokenize(text):
+    return [
+        word
+        for word in _WORD.findall(text.lower())
+        if word not in STOP_WORDS and len(word) > 1
+    ]
+
+
+def chunk_pages(pages, chunk_chars=CHUNK_CHARS, start_position=0):
+    """
+    Split (page number, text) pairs into chunks of roughly `chunk_chars`,
+    cutting only between paragraphs. Yields (page, position, text); a chunk
+    never spans two pages, so every excerpt can be cited by page.
+    """
+    position = start_position
+    for page, text in pages:
+        buffer = []
+        size = 0
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if buffer and size + len(paragraph) > chunk_chars:
+                yield page, position, "\n\n".join(buffer)
+                position += 1
+                buffer, size = [], 0
+            buffer.append(paragraph)
+            size += len(paragraph)
+        if buffer:
+            yield page, position, "\n\n".join(buffer)
+            position += 1
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks (anything with a .content)."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.term_counts = [Counter(tokenize(chunk.content)) for chunk in chunks]
+        self.size = sum(len(chunk.content) for chunk in chunks) + BYTES_PER_TERM * sum(
+            len(counts) for counts in self.term_counts
+        )
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = sum(self.lengths) / len(chunks) if chunks else 0
+        document_frequency = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+        total = len(chunks)
+        self.idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def search(self, query, k):
+        """Return up to k (score, chunk) pairs, best first; zero scores are dropped."""
+        terms = [term for term in set(tokenize(query)) if term in self.idf]
+        if not terms:
+            return []
+        scored = []
+        for i, counts in enumerate(self.term_counts):
+            norm = K1 * (1 - B + B * self.lengths[i] / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (K1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, i))
+        scored.sort(reverse=True)
+        return [(score, self.chunks[i]) for score, i in scored[:k]]
+
+
+_lock = threading.Lock()
+_indexes = OrderedDict()  # channel id -> (stamp, index), least recently used first
+_cached_size = 0
+
+
+def _channel_index(channel_id):
+    """
+    BM25 index of a channel's chunks, cached per process. Chunks are only
+    ever added, so (count, last id) identifies an index that is still valid.
+    The cache holds the most recently used indexes up to
+    DOCUMENT_INDEX_CACHE_MB in all (estimated from their text and terms); a larger
+    index is built for the request and not kept.
+    """
+    global _cached_size
+    rows = DocumentChunk.objects.filter(channel_id=channel_id)
+    stamp = tuple(rows.aggregate(count=Count("id"), last=Max("id")).values())
+    with _lock:
+        cached = _indexes.get(channel_id)
+        if cached is not None and cached[0] == stamp:
+            _indexes.move_to_end(channel_id)
+            return cached[1]
+    index = BM25Index(list(rows.only("document", "page", "content").order_by("id")))
+    budget = settings.DOCUMENT_INDEX_CACHE_MB * 1024 * 1024
+    if index.size > budget:
+        return index
+    with _lock:
+        previous = _indexes.pop(channel_id, None)
+        if previous is not None:
+            _cached_size -= previous[1].size
+        _indexes[channel_id] = (stamp, index)
+        _cached_size += index.size
+        while _cached_size > budget:
+            _, (_, evicted) = _indexes.popitem(last=False)
+            _cached_size -= evicted.size
+    return index
+
+
+def build_chunks(channel_id, document, pages, start_position=0):
+    """Unsaved DocumentChunk rows for one document's (page, text) pairs."""
+    return [
+        DocumentChunk(
+            channel_id=channel_id,
+            document=document,
+            page=page,
+            position=position,
+            content=text,
+        )
+        for page, position, text in chunk_pages(pages, start_position=start_position)
+    ]
+
+
+def select_chunks(index, query, k, max_tokens):
+    """Top-k chunks for `query` that fit in `max_tokens` (at least one)."""
+    selected = []
+    used = 0
+    for _, chunk in index.search(query, k):
+        tokens = len(chunk.content) // CHARS_PER_TOKEN
+        if selected and used + tokens > max_tokens:
+            break
+        selected.append(chunk)
+        used += tokens
+    return selected
+
+
+def retrieve(channel_id, query, k, max_tokens, pending=()):
+    """
+    Relevant chunks of the channel's documents for `query`. `pending` holds
+    unsaved chunks from this request (e.g. before the channel row exists),
+    which are searched together with the stored ones.
+    """
+    if pending:
+        stored = list(_channel_index(channel_id).chunks) if channel_id else []
+        index = BM25Index(stored + list(pending))
+    else:
+        index = _channel_index(channel_id)
+    return select_chunks(index, query, k, max_tokens)
+
+
+def excerpts_message(chunks):
+    """System message carrying retrieved chunks into the model input."""
+    parts = [
+        f"[{chunk.document}, page {chunk.page}]\n{chunk.content}" for chunk in chunks
+    ]
+    return {
+        "role": "system",
+        "content": "Relevant excerpts from the documents the user shared:\n\n"
+        + "\n\n---\n\n".join(parts),
+    }
@@ -1,7 +1,22 @@
+import io
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
 from markitdown import MarkItDown
+from pdfminer import high_level
+from pdfminer.layout import LTTextContainer
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
 
 md = MarkItDown()
 
+# Rough size of a token in characters, used for the extraction budget
+CHARS_PER_TOKEN = 4
+
+_pool = None
+
 
 def read_file(file_bytes):
     """Load a DOCX, PDF file and convert its content to Markdown format.
@@ -10,3 +25,138 @@ def read_file(file_bytes):
         file_bytes: .
     """
     return md.convert(file_bytes).markdown
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN
+
+
+def pdf_page_count(file_bytes):
+    """Number of pages declared in the PDF page tree, or None if unreadable."""
+    try:
+        document = PDFDocument(PDFParser(io.BytesIO(file_bytes)))
+        return resolve1(document.catalog["Pages"]).get("Count")
+    except Exception:
+        return None
+
+
+def iter_pdf_pages(file_bytes, start_page=1):
+    """
+    Yield (page number, text) for each page of a PDF, starting at the 1-based
+    `start_page`. Pages are laid out one at a time, so a caller that stops
+    iterating never pays for the rest of the document.
+    """
+    page_numbers = range(start_page - 1, sys.maxsize)
+    for number, page in enumerate(
+        high_level.extract_pages(io.BytesIO(file_bytes), page_numbers=page_numbers),
+        start=start_page,
+    ):
+        text = "".join(
+            element.get_text()
+            for element in page
+            if isinstance(element, LTTextContainer)
+        )
+        yield number, text.strip()
+
+
+def read_document(file_bytes, ext, max_pages, max_tokens, start_page=1):
+    """
+    Extract a PDF or DOCX within a page / token budget.
+
+    PDFs are read page by page until `max_pages` pages or `max_tokens`
+    (estimated) are reached; the first page is always included. DOCX files
+    have no pages, so they count as a single page cut at the token budget.
+
+    Returns {"text", "pages", "page_count", "truncated"}, where "pages" lists
+    the 1-based pages included; a follow-up call with start_page set past the
+    last of them continues where this one stopped.
+    """
+    if ext != "pdf":
+        text = read_file(io.BytesIO(file_bytes))
+        limit = max_tokens * CHARS_PER_TOKEN
+        return {
+            "text": text[:limit],
+            "pages": [1],
+            "page_count": 1,
+            "truncated": len(text) > limit,
+        }
+
+    page_count = pdf_page_count(file_bytes)
+    parts, pages, tokens = [], [], 0
+    truncated = False
+    for number, text in iter_pdf_pages(file_bytes, start_page):
+        page_tokens = estimate_tokens(text)
+        if pages and (len(pages) >= max_pages or tokens + page_tokens > max_tokens):
+            truncated = True
+            break
+        parts.append(f"## Page {number}\n\n{text}")
+        pages.append(number)
+        tokens += page_tokens
+    return {
+        "text": "\n\n".join(parts),
+        "pages": pages,
+        "page_count": page_count,
+        "truncated": truncated,
+    }
+
+
+def read_pages(file_bytes, ext, max_pages, max_tokens=None, start_page=1):
+    """
+    (page number, text) pairs of a PDF for indexing, from the 1-based
+    `start_page` up to `max_pages` pages or `max_tokens` (estimated), with
+    the same budget rule as read_document(). A DOCX has no pages, so its
+    whole text is returned as page 1.
+    """
+    if ext != "pdf":
+        return [(1, read_file(io.BytesIO(file_bytes)))]
+    pages, tokens = [], 0
+    for number, text in iter_pdf_pages(file_bytes, start_page):
+        page_tokens = estimate_tokens(text)
+        if pages and (
+            len(pages) >= max_pages
+            or (max_tokens is not None and tokens + page_tokens > max_tokens)
+        ):
+            break
+        pages.append((number, text))
+        tokens += page_tokens
+    return pages
+
+
+def _get_pool(workers):
+    global _pool
+    if _pool is None:
+        # spawn: never fork a process that may hold DB connections or threads
+        _pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def _run(workers, func, *args):
+    if workers <= 0:
+        return func(*args)
+    return _get_pool(workers).submit(func, *args).result()
+
+
+def extract_document(file, ext, max_pages, max_tokens, start_page=1, workers=0):
+    """
+    read_document() for an uploaded file object. With workers > 0 the
+    extraction runs in a shared process pool, so CPU-heavy PDF layout
+    does not hold the request worker's GIL.
+    """
+    file.seek(0)
+    return _run(
+        workers, read_document, file.read(), ext, max_pages, max_tokens, start_page
+    )
+
+
+def extract_pages(file, ext, max_pages, max_tokens=None, workers=0):
+    """
+    (read_pages(), page count) for an uploaded file object, the pages
+    extracted in the process pool if enabled. The count is None for a DOCX
+    or an unreadable page tree.
+    """
+    file.seek(0)
+    file_bytes = file.read()
+    page_count = pdf_page_count(file_bytes) if ext == "pdf" else None
+    return _run(workers, read_pages, file_bytes, ext, max_pages, max_tokens), page_count
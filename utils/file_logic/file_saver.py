@@ -1,61 +1,139 @@
+import hashlib
 import os
+import re
+import tempfile
+from collections import Counter
 
 from django.conf import settings
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
+from api.channel.models import Attachment, Blob
 
-def save_uploaded_files(user_id, channel_id, uploaded_files):
+BLOB_DIR = "blobs"
+
+# "<base>(<n>)": a name already renamed by save_uploaded_files
+_numbered = re.compile(r"(?P<base>.*)\((?P<n>\d+)\)")
+
+
+def blob_relative_path(sha256):
+    """Sharded location of a blob inside MEDIA_ROOT: blobs/<aa>/<bb>/<sha256>."""
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def legacy_relative_path(user_id, channel_id, name):
+    """Per-channel location used before blobs were content addressed."""
+    return os.path.join(str(user_id), str(channel_id), name)
+
+
+def store_blob(uploaded):
+    """
+    Stream an uploaded file into the blob store, hashing it on the way.
+    Content that is already stored is not written again. References are
+    only taken by create_attachments(), so a request failing in between
+    leaves at worst an unreferenced blob for gc_blobs.
+
+    The row is stamped (last_referenced_at) before the file is checked, and
+    gc_blobs deletes a row before its file: an existing row therefore keeps
+    its file through the upload, and a row this call had to create (gc got
+    there first) gets the file written again.
+    Returns the Blob.
+    """
+    tmp_dir = os.path.join(settings.MEDIA_ROOT, BLOB_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+        for chunk in uploaded.chunks():
+            digest.update(chunk)
+            tmp.write(chunk)
+            size += len(chunk)
+    sha256 = digest.hexdigest()
+
+    now = timezone.now()
+    touched = Blob.objects.filter(pk=sha256).update(last_referenced_at=now)
+    blob, created = Blob.objects.get_or_create(
+        sha256=sha256,
+        defaults={
+            "size": size,
+            "content_type": getattr(uploaded, "content_type", "") or "",
+            "last_referenced_at": now,
+        },
+    )
+
+    blob_path = os.path.join(settings.MEDIA_ROOT, blob_relative_path(sha256))
+    if touched and os.path.exists(blob_path):
+        os.unlink(tmp.name)  # duplicate upload: no extra disk
+    else:
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(tmp.name, blob_path)  # atomic, so readers never see partial blobs
+    return blob
+
+
+def create_attachments(attachments):
     """
-    Save uploaded files in MEDIA_ROOT/<user_id>/<channel_id>/.
-    Automatically renames duplicates with (1), (2), etc.
-    Returns a list of saved file names (same as original function).
+    Save the Attachment rows from save_uploaded_files() and take their blob
+    references in the same transaction, so the counts never drift from the
+    rows. Call it inside the transaction that saves the channel.
     """
-    saved_files = []
+    refs = Counter(attachment.blob_id for attachment in attachments)
+    with transaction.atomic():
+        Attachment.objects.bulk_create(attachments)
+        for sha256, count in refs.items():
+            Blob.objects.filter(pk=sha256).update(ref_count=F("ref_count") + count)
+
 
-    # Absolute directory on disk (kept so other parts of your app can read files from disk)
-    user_media_dir_abs = os.path.join(
-        settings.MEDIA_ROOT, str(user_id), str(channel_id)
+def save_uploaded_files(user_id, channel_id, uploaded_files, blobs=None):
+    """
+    Store uploaded files in the content-addressed blob store and give each a
+    unique display name inside the channel, renaming duplicates with (1), (2),
+    etc. Taken names are loaded once per call and the next free number is
+    kept per base name, so a collision costs one dict lookup.
+    `blobs` maps uploads already stored earlier in the request to their
+    Blob, so they are not hashed and copied again.
+    Returns (saved file names, unsaved Attachment rows); the caller saves
+    the rows with create_attachments() once the channel exists.
+    """
+    taken = set(
+        Attachment.objects.filter(channel_id=channel_id).values_list("name", flat=True)
     )
-    os.makedirs(user_media_dir_abs, exist_ok=True)
+    # Files saved before blobs existed still own their names
+    legacy_dir = os.path.join(settings.MEDIA_ROOT, str(user_id), str(channel_id))
+    if os.path.isdir(legacy_dir):
+        taken.update(os.listdir(legacy_dir))
 
-    # Relative folder inside storage (used when calling default_storage.save)
-    relative_folder = os.path.join(str(user_id), str(channel_id))
+    # Highest number used so far per (base name, extension)
+    numbers = {}
+    for name in taken:
+        stem, ext = os.path.splitext(name)
+        match = _numbered.fullmatch(stem)
+        if match:
+            key = (match["base"], ext)
+            numbers[key] = max(numbers.get(key, 0), int(match["n"]))
 
+    files = []
+    attachments = []
     for uploaded in uploaded_files:
         # Strip any client-side path components (prevents traversal attempts)
         original_name = os.path.basename(uploaded.name)
 
-        # Split name and ext (preserve original naming behavior)
         base_name, ext = os.path.splitext(original_name)
         save_name = original_name
+        if save_name in taken:
+            number = numbers.get((base_name, ext), 0) + 1
+            numbers[(base_name, ext)] = number
+            save_name = f"{base_name}({number}){ext}"
+        else:
+            match = _numbered.fullmatch(base_name)
+            if match:  # keep later renames of its base past this number
+                key = (match["base"], ext)
+                numbers[key] = max(numbers.get(key, 0), int(match["n"]))
+        taken.add(save_name)
+
+        blob = (blobs or {}).get(uploaded) or store_blob(uploaded)
+        attachments.append(Attachment(channel_id=channel_id, name=save_name, blob=blob))
+        files.append(save_name)
 
-        # Use filesystem check against the absolute folder to keep your (1), (2) naming
-        candidate_abs_path = os.path.join(user_media_dir_abs, save_name)
-        counter = 1
-        while os.path.exists(candidate_abs_path):
-            save_name = f"{base_name}({counter}){ext}"
-            candidate_abs_path = os.path.join(user_media_dir_abs, save_name)
-            counter += 1
-
-        # Build relative storage path (no leading slash)
-        rel_path = os.path.join(relative_folder, save_name).lstrip("/\\")
-
-        # Save using default_storage with RELATIVE name (this is the fix)
-        default_storage.save(rel_path, ContentFile(uploaded.read()))
-
-        # Keep returned "path" as absolute on-disk path (matches original function)
-        saved_files.append(
-            {
-                "original_name": original_name,
-                "saved_name": save_name,
-                "path": candidate_abs_path,  # absolute filesystem path (for backward compatibility)
-            }
-        )
-
-        # optional debug
-        print(f"file process: {saved_files}")
-
-    # Return list of saved file-names (same shape as your original function)
-    files = [fobj.get("saved_name") for fobj in saved_files if fobj]
-    return files
+    return files, attachments
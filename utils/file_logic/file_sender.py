@@ -0,0 +1,208 @@
+import mimetypes
+import os
+import secrets
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+# More ranges than this in one request is treated as abuse: the full file is sent
+MAX_RANGES = 16
+
+
+def _content_type(file_name):
+    return mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+
+def _parse_range(header, size):
+    """
+    Parse a "bytes=" Range header into inclusive (start, end) pairs.
+
+    Returns None when the header is absent or malformed (serve the full file),
+    and an empty list when no range is satisfiable (416).
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    ranges = []
+    for part in header[len("bytes=") :].split(","):
+        start, sep, end = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start:  # suffix range: last N bytes
+                length = int(end)
+                if length > 0 and size > 0:
+                    ranges.append((max(size - length, 0), size - 1))
+                continue
+            start = int(start)
+            end = int(end) if end else None
+        except ValueError:
+            return None
+        if end is not None and start > end:
+            return None
+        if start < size:
+            ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+
+def _if_range_passes(request, etag, last_modified):
+    """A Range is only honoured if If-Range (when sent) still matches the file."""
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def _read(f, start, end):
+    f.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = f.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _stream_ranges(f, ranges, size, content_type, boundary=None):
+    try:
+        if boundary is None:
+            start, end = ranges[0]
+            yield from _read(f, start, end)
+            return
+        for start, end in ranges:
+            yield (
+                f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode()
+            yield from _read(f, start, end)
+        yield f"\r\n--{boundary}--\r\n".encode()
+    finally:
+        f.close()
+
+
+def _ranged_response(file_path, ranges, size, content_type):
+    f = open(file_path, "rb")
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(
+            _stream_ranges(f, ranges, size, content_type),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        return response
+
+    boundary = secrets.token_hex(16)
+    length = len(f"\r\n--{boundary}--\r\n")
+    for start, end in ranges:
+        length += len(
+            f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        )
+        length += end - start + 1
+    response = StreamingHttpResponse(
+        _stream_ranges(f, ranges, size, content_type, boundary),
+        status=206,
+        content_type=f"multipart/byteranges; boundary={boundary}",
+    )
+    response["Content-Length"] = str(length)
+    return response
+
+
+def send_file(request, relative_path: str, file_name: str, attachment=None):
+    """
+    Return a response serving MEDIA_ROOT/<relative_path>, according to
+    settings.FILE_SERVE_MODE:
+
+    - "django": stream it from this worker (dev fallback), honouring single
+      and multi-part Range requests.
+    - "x-accel": hand it to nginx with X-Accel-Redirect; nginx needs an
+      internal location mapping FILE_SERVE_INTERNAL_URL to MEDIA_ROOT, e.g.
+          location /protected-media/ { internal; alias /srv/campused/media/; }
+    - "x-sendfile": hand it to Apache mod_xsendfile (or lighttpd) with the
+      absolute path in X-Sendfile.
+
+    Every mode answers If-None-Match / If-Modified-Since with 304. Validators
+    come from the Attachment row (strong ETag = SHA-256 of its blob) so
+    revalidation needs no filesystem access; files saved before attachments
+    were recorded fall back to one stat.
+
+    Ownership must be checked by the caller before calling this.
+    """
+    mode = settings.FILE_SERVE_MODE
+    file_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    content_type = _content_type(file_name)
+
+    if attachment is not None:
+        etag = quote_etag(attachment.blob_id)
+        last_modified = int(attachment.created_at.timestamp())
+        size = attachment.blob.size
+    else:
+        try:
+            stat = os.stat(file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise Http404("File not found")
+        etag = quote_etag(f"{int(stat.st_mtime):x}-{stat.st_size:x}")
+        last_modified = int(stat.st_mtime)
+        size = stat.st_size
+
+    response = HttpResponse(content_type=content_type)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = f'inline; filename="{file_name}"'
+    patch_cache_control(response, private=True, max_age=settings.FILE_CACHE_MAX_AGE)
+
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=response
+    )
+    if conditional is not response:
+        return conditional
+
+    if mode == "x-accel":
+        # nginx serves Range requests and answers 404 itself if the file is missing
+        response["X-Accel-Redirect"] = settings.FILE_SERVE_INTERNAL_URL + quote(
+            relative_path
+        )
+        return response
+
+    if mode == "x-sendfile":
+        response["X-Sendfile"] = file_path
+        return response
+
+    ranges = None
+    if _if_range_passes(request, etag, last_modified):
+        ranges = _parse_range(request.META.get("HTTP_RANGE"), size)
+
+    if ranges == []:
+        unsatisfiable = HttpResponse(status=416)
+        unsatisfiable["Content-Range"] = f"bytes */{size}"
+        return unsatisfiable
+
+    try:
+        if ranges:
+            served = _ranged_response(file_path, ranges, size, content_type)
+        else:
+            served = FileResponse(open(file_path, "rb"), content_type=content_type)
+    except FileNotFoundError:
+        raise Http404("File not found")
+
+    for header in (
+        "ETag",
+        "Last-Modified",
+        "Accept-Ranges",
+        "Content-Disposition",
+        "Cache-Control",
+    ):
+        served[header] = response[header]
+    return served
@@ -0,0 +1,97 @@
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from api.channel.models import DocumentChunk, DocumentIndexJob
+
+from . import doc_index, file_loader, file_saver
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+# How long a worker may hold a job before another one takes it over
+LEASE = timedelta(minutes=15)
+
+
+def _claim(batch_size):
+    """Mark up to `batch_size` due jobs running, in a short transaction."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            DocumentIndexJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=DocumentIndexJob.PENDING)
+                | Q(status=DocumentIndexJob.RUNNING, locked_until__lt=now)
+            )
+            .order_by("created_at")[:batch_size]
+        )
+        for job in jobs:
+            job.status = DocumentIndexJob.RUNNING
+            job.locked_until = now + LEASE
+            job.attempts += 1
+        DocumentIndexJob.objects.bulk_update(
+            jobs, ["status", "locked_until", "attempts"]
+        )
+    return jobs
+
+
+def _index(job):
+    """Chunk the job's remaining pages and store them, then drop the job."""
+    remaining = settings.DOCUMENT_INDEX_MAX_PAGES - (job.start_page - 1)
+    pages = []
+    if remaining > 0:
+        path = os.path.join(
+            settings.MEDIA_ROOT, file_saver.blob_relative_path(job.blob_id)
+        )
+        with open(path, "rb") as f:
+            pages = file_loader.read_pages(
+                f.read(), "pdf", remaining, start_page=job.start_page
+            )
+    last = (
+        DocumentChunk.objects.filter(channel_id=job.channel_id, document=job.document)
+        .aggregate(last=Max("position"))
+        .get("last")
+    )
+    chunks = doc_index.build_chunks(
+        job.channel_id,
+        job.document,
+        pages,
+        start_position=0 if last is None else last + 1,
+    )
+    with transaction.atomic():
+        DocumentChunk.objects.bulk_create(chunks)
+        job.delete()
+    return len(pages)
+
+
+def run_batch(batch_size):
+    """
+    Index up to `batch_size` queued documents and return (done, failed)
+    counts. Jobs are claimed with SKIP LOCKED and a lease, and the PDF work
+    happens outside any transaction; a failing job is retried on later runs
+    up to MAX_ATTEMPTS.
+    """
+    done = failed = 0
+    for job in _claim(batch_size):
+        try:
+            pages = _index(job)
+        except Exception as e:
+            logger.exception("Indexing %s (job %s) failed", job.document, job.pk)
+            job.status = (
+                DocumentIndexJob.FAILED
+                if job.attempts >= MAX_ATTEMPTS
+                else DocumentIndexJob.PENDING
+            )
+            job.locked_until = None
+            job.last_error = str(e)[:2000]
+            job.save(update_fields=["status", "locked_until", "last_error"])
+            failed += 1
+            continue
+        logger.info("Indexed %d more pages of %s", pages, job.document)
+        done += 1
+    return done, failed
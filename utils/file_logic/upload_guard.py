@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser
+from django.http.multipartparser import MultiPartParserError
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+# Leading bytes of every type we accept; DOCX is a ZIP container.
+MAGIC_BYTES = {
+    "application/pdf": [b"%PDF-"],
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": [
+        b"PK\x03\x04"
+    ],
+    "image/jpeg": [b"\xff\xd8\xff"],
+    "image/png": [b"\x89PNG\r\n\x1a\n"],
+    "image/webp": [b"RIFF"],
+}
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "File too large"
+    default_code = "upload_too_large"
+
+
+class UploadTypeNotAllowed(APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = "File type not allowed"
+    default_code = "upload_type_not_allowed"
+
+
+def _sniff_matches(content_type, head):
+    if content_type == "image/webp":
+        return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+    return any(head.startswith(magic) for magic in MAGIC_BYTES.get(content_type, []))
+
+
+class UploadGuardHandler(FileUploadHandler):
+    """
+    First upload handler in the chain: checks the declared type, the magic
+    bytes of the first chunk and the running per-file / per-request sizes
+    while the body is streamed, and stops reading the request (StopUpload
+    with connection_reset) as soon as a limit is broken, so nothing more is
+    buffered or spooled to disk.
+    """
+
+    def __init__(self, request, max_file_size, max_request_size, allowed_types):
+        super().__init__(request)
+        self.max_file_size = max_file_size
+        self.max_request_size = max_request_size
+        self.allowed_types = allowed_types
+        self.request_bytes = 0
+        self.error = None
+
+    def _reject(self, error):
+        self.error = error
+        raise StopUpload(connection_reset=True)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file_bytes = 0
+        if self.content_type not in self.allowed_types:
+            self._reject(
+                UploadTypeNotAllowed(f"File type {self.content_type} not allowed")
+            )
+        if self.content_length and self.content_length > self.max_file_size:
+            self._reject(UploadTooLarge())
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not _sniff_matches(self.content_type, raw_data[:16]):
+            self._reject(
+                UploadTypeNotAllowed(
+                    f"Content of {self.file_name} does not match {self.content_type}"
+                )
+            )
+        self.file_bytes += len(raw_data)
+        self.request_bytes += len(raw_data)
+        if self.file_bytes > self.max_file_size:
+            self._reject(UploadTooLarge())
+        if self.request_bytes > self.max_request_size:
+            self._reject(UploadTooLarge("Upload exceeds the per-request size limit"))
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class GuardedMultiPartParser(MultiPartParser):
+    """
+    MultiPartParser enforcing upload limits while the body is parsed.
+
+    Limits come from the view, so they can differ per endpoint:
+        upload_max_file_size     (default settings.MAX_UPLOAD_FILE_SIZE)
+        upload_max_request_size  (default settings.MAX_UPLOAD_REQUEST_SIZE)
+        upload_allowed_types     (default: every type in MAGIC_BYTES)
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context["request"]
+        view = parser_context.get("view")
+        max_file_size = getattr(
+            view, "upload_max_file_size", settings.MAX_UPLOAD_FILE_SIZE
+        )
+        max_request_size = getattr(
+            view, "upload_max_request_size", settings.MAX_UPLOAD_REQUEST_SIZE
+        )
+        allowed_types = getattr(view, "upload_allowed_types", list(MAGIC_BYTES))
+
+        # Reject on the declared length before reading a single body byte
+        try:
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > max_request_size:
+            raise UploadTooLarge("Upload exceeds the per-request size limit")
+
+        guard = UploadGuardHandler(
+            request._request, max_file_size, max_request_size, allowed_types
+        )
+        meta = request.META.copy()
+        meta["CONTENT_TYPE"] = media_type
+        try:
+            parser = DjangoMultiPartParser(
+                meta,
+                stream,
+                [guard, *request.upload_handlers],
+                parser_context.get("encoding", settings.DEFAULT_CHARSET),
+            )
+            data, files = parser.parse()
+        except MultiPartParserError as exc:
+            raise ParseError("Multipart form parse error - %s" % str(exc))
+
+        if guard.error is not None:
+            raise guard.error
+        return DataAndFiles(data, files)
@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The server is busy. Please try again shortly."
+    default_code = "overloaded"
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        self.wait = wait  # sent as Retry-After
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Per-user token bucket for unsafe requests: LLM_RATE_BURST requests at
+    once, refilled at LLM_RATE_PER_MINUTE. The bucket lives in the Django
+    cache, so it is shared by every process using the same cache. Like DRF's
+    own throttles, two requests racing on one bucket may both get through;
+    the in-flight limit bounds that.
+    """
+
+    def __init__(self):
+        self.rate = settings.LLM_RATE_PER_MINUTE / 60
+        self.burst = settings.LLM_RATE_BURST
+        self._wait = None
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS or self.rate <= 0:
+            return True
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        key = f"llm-bucket:{ident}"
+
+        now = time.time()
+        tokens, updated = cache.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._wait = (1 - tokens) / self.rate
+            return False
+        # Expires once it would have refilled anyway
+        cache.set(key, (tokens - 1, now), int(self.burst / self.rate) + 1)
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class LocalInflight:
+    """Per-user in-flight counters for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+
+    def acquire(self, user_id, limit):
+        with self._lock:
+            if self._counts[user_id] >= limit:
+                return False
+            self._counts[user_id] += 1
+            return True
+
+    def release(self, user_id):
+        with self._lock:
+            self._counts[user_id] -= 1
+            if self._counts[user_id] <= 0:
+                del self._counts[user_id]
+
+
+class CacheInflight:
+    """
+    Per-user in-flight counters in the Django cache, shared by every node
+    using it (including the database cache backend). Counters expire after
+    LLM_INFLIGHT_TTL seconds, so slots held by a crashed process come back.
+    """
+
+    @staticmethod
+    def _key(user_id):
+        return f"llm-inflight:{user_id}"
+
+    def acquire(self, user_id, limit):
+        key = self._key(user_id)
+        cache.add(key, 0, settings.LLM_INFLIGHT_TTL)
+        try:
+            count = cache.incr(key)
+        except ValueError:  # expired between add() and incr()
+            cache.add(key, 1, settings.LLM_INFLIGHT_TTL)
+            count = 1
+        if count > limit:
+            self.release(user_id)
+            return False
+        return True
+
+    def release(self, user_id):
+        try:
+            cache.decr(self._key(user_id))
+        except ValueError:  # already expired
+            pass
+
+
+class UpstreamGate:
+    """
+    Caps the LLM-backed requests this process runs at once. Requests over
+    the cap queue for up to `timeout` seconds; when `max_queue` are already
+    waiting, or the wait times out, they are shed instead so a backlog never
+    builds up behind a slow upstream.
+    """
+
+    def __init__(self, limit, max_queue, timeout):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+
+    def acquire(self):
+        """True once a slot is held; False when the request should be shed."""
+        if self._slots.acquire(blocking=False):
+            self._admitted()
+            return True
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+            self.waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if not acquired:
+            with self._lock:
+                self.shed += 1
+            return False
+        self._admitted()
+        return True
+
+    def _admitted(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "max_queue": self.max_queue,
+                "shed": self.shed,
+            }
+
+
+_inflight = None
+_gate = None
+_init_lock = threading.Lock()
+
+
+def get_inflight():
+    """The per-user in-flight tracker picked by LLM_INFLIGHT_BACKEND."""
+    global _inflight
+    if _inflight is None:
+        with _init_lock:
+            if _inflight is None:
+                backend = settings.LLM_INFLIGHT_BACKEND
+                _inflight = CacheInflight() if backend == "cache" else LocalInflight()
+    return _inflight
+
+
+def get_gate():
+    global _gate
+    if _gate is None:
+        with _init_lock:
+            if _gate is None:
+                _gate = UpstreamGate(
+                    settings.LLM_MAX_CONCURRENCY,
+                    settings.LLM_QUEUE_MAX,
+                    settings.LLM_QUEUE_TIMEOUT,
+                )
+    return _gate
+
+
+class AdmissionControlMixin:
+    """
+    DRF view mixin for endpoints that call the LLM upstream. Unsafe requests
+    are rate limited per user (TokenBucketThrottle, 429), limited to
+    LLM_USER_MAX_INFLIGHT at a time per user (429), then wait for one of the
+    process-wide upstream slots (503 when shed). One client can then hold at
+    most a few slots, and the rest stay free for everyone else.
+    """
+
+    throttle_classes = [TokenBucketThrottle]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            return
+        inflight = get_inflight()
+        user_id = request.user.pk
+        if not inflight.acquire(user_id, settings.LLM_USER_MAX_INFLIGHT):
+            raise Throttled(
+                wait=1,
+                detail="Too many requests in progress. Wait for one to finish.",
+            )
+        self._inflight_user = user_id
+
+        gate = get_gate()
+        if not gate.acquire():
+            raise Overloaded(wait=max(1, int(gate.timeout)))
+        self._holds_gate = True
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # dispatch() also ends this way when initial() raised
+            if getattr(self, "_holds_gate", False):
+                self._holds_gate = False
+                get_gate().release()
+            if getattr(self, "_inflight_user", None) is not None:
+                get_inflight().release(self._inflight_user)
+                self._inflight_user = None
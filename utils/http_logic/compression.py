@@ -0,0 +1,126 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: "br" is only offered when installed
+    brotli = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+    try:
+        import zstandard
+    except ImportError:  # optional: "zstd" is only offered when installed
+        zstandard = None
+else:
+    zstandard = None
+
+# Moderate levels: the responses are compressed per request, so a few percent
+# of extra ratio is not worth several times the CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+
+class _Gzip:
+    def __init__(self):
+        # wbits=31: gzip container around the deflate stream
+        self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        if zstd is not None:
+            self._obj = zstd.ZstdCompressor(level=ZSTD_LEVEL)
+            self._flush_block = zstd.ZstdCompressor.FLUSH_BLOCK
+        else:
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data):
+        return self._obj.compress(data) + self._obj.flush(self._flush_block)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+# Server preference, best ratio per CPU first
+ENCODERS = {"gzip": _Gzip}
+if zstd is not None or zstandard is not None:
+    ENCODERS = {"zstd": _Zstd, **ENCODERS}
+if brotli is not None:
+    ENCODERS = {"br": _Brotli, **ENCODERS}
+
+
+def negotiate(accept_encoding):
+    """
+    Pick the encoding for an Accept-Encoding header: the first of ENCODERS
+    the client accepts with q > 0 ("*" covers the ones it does not name),
+    or None for identity.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    for coding in ENCODERS:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(encoding, data):
+    encoder = ENCODERS[encoding]()
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(encoding, chunks):
+    """
+    Compress an iterable of byte chunks. Every chunk is flushed, so each one
+    reaches the client as soon as it is produced instead of sitting in the
+    compressor's window.
+    """
+    encoder = ENCODERS[encoding]()
+    for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+async def acompress_stream(encoding, chunks):
+    """compress_stream() for async iterables (ASGI streaming responses)."""
+    encoder = ENCODERS[encoding]()
+    async for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
@@ -0,0 +1,105 @@
+import json
+
+from django.conf import settings
+from django.core import checks
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # a dependency, but everything below still works without it
+    orjson = None
+ORJSON_INSTALLED = orjson is not None
+if not settings.FAST_JSON:
+    orjson = None
+
+# Datetimes go through the DRF/Django encoders so their format is unchanged;
+# non-str dict keys are rare, so they take the stdlib fallback
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+
+@checks.register()
+def check_orjson(app_configs, **kwargs):
+    if settings.FAST_JSON and not ORJSON_INSTALLED:
+        return [
+            checks.Warning(
+                "FAST_JSON is on but orjson is not installed; JSON goes through "
+                "the slower stdlib encoder.",
+                hint="Install the project dependencies, or set FAST_JSON=False.",
+                id="fast_json.W001",
+            )
+        ]
+    return []
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer using orjson for compact UTF-8 output, the shape every API
+    client gets. Indented (browsable API, ?indent=) or ASCII-only output, and
+    any value orjson rejects, go through the stdlib renderer unchanged.
+
+    The output decodes to the same data, but is not always the same bytes:
+    floats may be spelled differently (1e16 vs 1e+16), and NaN/Infinity
+    render as null where the strict stdlib renderer raises ValueError.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same as JSONRenderer: keep the output a strict JavaScript subset.
+        # U+2028/U+2029 start with 0xE2; a one-byte scan skips most payloads.
+        if b"\xe2" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+class FastJSONEncoder(DjangoJSONEncoder):
+    """
+    JSONField encoder: Django calls json.dumps(value, cls=FastJSONEncoder),
+    which ends in encode(), so orjson does the work and DjangoJSONEncoder
+    still handles dates, decimals and UUIDs.
+    """
+
+    def encode(self, o):
+        if orjson is None:
+            return super().encode(o)
+        try:
+            return orjson.dumps(o, default=self.default, option=ORJSON_OPTIONS).decode()
+        except (orjson.JSONEncodeError, TypeError):
+            return super().encode(o)
+
+
+class FastJSONDecoder(json.JSONDecoder):
+    """JSONField decoder: json.loads(value, cls=FastJSONDecoder) via orjson."""
+
+    def decode(self, s, *args, **kwargs):
+        if orjson is None:
+            return super().decode(s, *args, **kwargs)
+        return orjson.loads(s)
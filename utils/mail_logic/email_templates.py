@@ -0,0 +1,103 @@
+import html
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.template import Context, Template
+
+TEMPLATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "render_files"
+)
+
+_lock = threading.Lock()
+# filename -> (mtime, compiled HTML template, compiled text template)
+_cache = {}
+
+_DROP = re.compile(
+    r"<(head|style|script)\b.*?</\1\s*>|<!--.*?-->|\{#.*?#\}", re.DOTALL | re.IGNORECASE
+)
+_LINK = re.compile(
+    r"<a\b[^>]*\bhref=\"([^\"]*)\"[^>]*>(.*?)</a\s*>", re.DOTALL | re.IGNORECASE
+)
+_BREAK = re.compile(r"<br\s*/?>|</(p|div|h[1-6]|li|tr)\s*>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def html_to_text(source):
+    """
+    Plain-text version of an HTML template's source. Template tags are kept,
+    so the result compiles and renders like the HTML one; links become
+    "text: url" unless the url is already visible nearby.
+    """
+    source = _DROP.sub("", source)
+
+    def link(match):
+        url, label = match.groups()
+        return label if url in source[match.end() :] else f"{label}: {url}"
+
+    source = _LINK.sub(link, source)
+    source = _TAG.sub("", _BREAK.sub("\n", source))
+    lines = [" ".join(line.split()) for line in html.unescape(source).splitlines()]
+    text = re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+    # Text parts must not be HTML-escaped
+    return "{% autoescape off %}" + text + "\n{% endautoescape %}"
+
+
+def _compile(template_path):
+    try:
+        with open(template_path, "r", encoding="utf-8") as f:
+            source = f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Email template not found at {template_path}")
+    # A hand-written <name>.txt next to the template replaces the derived text
+    text_path = os.path.splitext(template_path)[0] + ".txt"
+    if os.path.exists(text_path):
+        with open(text_path, "r", encoding="utf-8") as f:
+            text_source = "{% autoescape off %}" + f.read() + "{% endautoescape %}"
+    else:
+        text_source = html_to_text(source)
+    return Template(source), Template(text_source)
+
+
+def get_templates(template_filename):
+    """
+    (html, text) compiled templates for render_files/<template_filename>,
+    compiled once per process. With DEBUG on, a changed file mtime
+    recompiles them, so edits show up without a restart.
+    """
+    template_path = os.path.join(TEMPLATE_DIR, template_filename)
+    cached = _cache.get(template_filename)
+    if cached is not None and not settings.DEBUG:
+        return cached[1], cached[2]
+
+    try:
+        mtime = os.stat(template_path).st_mtime
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Email template not found at {template_path}")
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+    with _lock:
+        html_template, text_template = _compile(template_path)
+        _cache[template_filename] = (mtime, html_template, text_template)
+    return html_template, text_template
+
+
+def render(template_filename, context):
+    """(html, text) bodies of one email."""
+    html_template, text_template = get_templates(template_filename)
+    context = Context(context)
+    return html_template.render(context), text_template.render(context)
+
+
+def render_many(template_filename, contexts):
+    """
+    (html, text) bodies for each context, e.g. one reminder per user: the
+    templates are looked up once for the whole batch.
+    """
+    html_template, text_template = get_templates(template_filename)
+    bodies = []
+    for context in contexts:
+        context = Context(context)
+        bodies.append((html_template.render(context), text_template.render(context)))
+    return bodies
@@ -0,0 +1,202 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from api.user.models import OutboxEmail
+
+from . import email_templates
+
+# Longest wait between two attempts at the same email
+MAX_RETRY_DELAY = 3600
+
+
+def enqueue(to, subject, template="", context=None, body="", dedupe=True):
+    """
+    Queue an email for the send_email_outbox worker: one INSERT, no rendering
+    and no SMTP in the request.
+
+    With `dedupe`, a second email for the same template (or subject) and
+    recipient in the same EMAIL_DEDUPE_SECONDS window is silently dropped,
+    so double-clicked "resend" buttons send one email.
+    """
+    now = timezone.now()
+    dedupe_key = None
+    window = settings.EMAIL_DEDUPE_SECONDS
+    if dedupe and window > 0:
+        bucket = int(now.timestamp()) // window
+        dedupe_key = f"{template or subject}:{to.lower()}:{bucket}"[:255]
+    OutboxEmail.objects.bulk_create(
+        [
+            OutboxEmail(
+                to=to,
+                subject=subject,
+                template=template,
+                context=context or {},
+                body=body,
+                dedupe_key=dedupe_key,
+                next_attempt_at=now,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def render_bodies(emails):
+    """
+    {email id: (html, text)} for the templated emails of a batch, rendered
+    with email_templates.render_many() one template at a time.
+    """
+    by_template = defaultdict(list)
+    for email in emails:
+        if email.template:
+            by_template[email.template].append(email)
+    bodies = {}
+    for template, group in by_template.items():
+        rendered = email_templates.render_many(
+            template, [email.context for email in group]
+        )
+        bodies.update(zip((email.id for email in group), rendered))
+    return bodies
+
+
+def build_message(email, bodies=None, connection=None):
+    """
+    The message for an outbox row: its template as HTML with a plain-text
+    alternative (pre-rendered in `bodies`, else rendered here), or its body.
+    """
+    if email.template:
+        if bodies and email.id in bodies:
+            html_body, text_body = bodies[email.id]
+        else:
+            html_body, text_body = email_templates.render(email.template, email.context)
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=text_body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email.to],
+            connection=connection,
+        )
+        message.attach_alternative(html_body, "text/html")
+        return message
+    return EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.to],
+        connection=connection,
+    )
+
+
+def _schedule_retry(email, error, now):
+    email.last_error = str(error)[:2000]
+    if email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+        return
+    email.status = OutboxEmail.PENDING
+    delay = settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1)
+    email.next_attempt_at = now + timedelta(seconds=min(delay, MAX_RETRY_DELAY))
+
+
+def _claim(batch_size, now):
+    """
+    Mark up to `batch_size` due emails as sending, in a short transaction.
+    The claim lasts long enough to send the whole batch; rows still sending
+    after that (a worker died mid-batch) are due again, and count the attempt.
+    """
+    lease = timedelta(seconds=max(60, 2 * batch_size * settings.EMAIL_TIMEOUT))
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[OutboxEmail.PENDING, OutboxEmail.SENDING],
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        for email in emails:
+            email.status = OutboxEmail.SENDING
+            email.next_attempt_at = now + lease
+            email.attempts += 1
+        OutboxEmail.objects.bulk_update(
+            emails, ["status", "next_attempt_at", "attempts"]
+        )
+    return emails
+
+
+def send_batch(batch_size):
+    """
+    Send up to `batch_size` due emails over one SMTP connection and return
+    (sent, failed) counts; failures are retried with exponential backoff
+    until EMAIL_MAX_ATTEMPTS. Rows are claimed with SKIP LOCKED in a short
+    transaction, so several workers can drain the outbox side by side and no
+    lock is held while talking to the SMTP server. Sent emails keep no
+    context or body: activation and reset links are not left in the table.
+    """
+    now = timezone.now()
+    sent = failed = 0
+    emails = _claim(batch_size, now)
+    if not emails:
+        return sent, failed
+
+    connection = get_connection(fail_silently=False)
+    pending = list(emails)
+    try:
+        bodies = render_bodies(emails)
+        connection.open()
+        while pending:
+            email = pending.pop(0)
+            try:
+                connection.send_messages([build_message(email, bodies, connection)])
+            except Exception as e:
+                _schedule_retry(email, e, now)
+                failed += 1
+                # The server may have dropped us; go on over a fresh connection
+                connection.close()
+                connection.open()
+                continue
+            email.status = OutboxEmail.SENT
+            email.sent_at = timezone.now()
+            email.last_error = ""
+            email.context = {}
+            email.body = ""
+            sent += 1
+    except Exception as e:
+        # No connection to the server: the rest of the batch waits
+        for email in pending:
+            _schedule_retry(email, e, now)
+            failed += 1
+    finally:
+        connection.close()
+
+    OutboxEmail.objects.bulk_update(
+        emails,
+        [
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "last_error",
+            "sent_at",
+            "context",
+            "body",
+        ],
+    )
+    return sent, failed
+
+
+def prune():
+    """
+    Delete sent and failed emails older than EMAIL_OUTBOX_RETENTION_DAYS and
+    return how many were deleted (0 disables pruning).
+    """
+    days = settings.EMAIL_OUTBOX_RETENTION_DAYS
+    if days <= 0:
+        return 0
+    deleted, _ = OutboxEmail.objects.filter(
+        status__in=[OutboxEmail.SENT, OutboxEmail.FAILED],
+        created_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
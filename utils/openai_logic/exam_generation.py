@@ -4,6 +4,7 @@ from typing import List, Literal
 from pydantic import BaseModel, ConfigDict, Field
 
 from .client_create import client
+from .model_router import route
 
 
 class Options(BaseModel):
@@ -92,7 +93,7 @@ class ExamPrepare:
         Synchronous exam generator.
 
         Returns:
-        (questions_list, token_cost_estimate)
+        (questions_list, input_tokens, output_tokens, model_used)
 
         NOTE: This is a placeholder implementation that returns simple generated
         dummy questions. Replace the internals with your real generation logic,
@@ -108,20 +109,24 @@ class ExamPrepare:
         if self.mode == "flashcard":
             system_prompt = self._flashcard_prompt()
             to_generate = FlashCardBatch
-        response = client.responses.parse(
-            model="gpt-4o-mini",
-            input=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": f"Generate the {self.n} number of the questions",
-                },
-            ],
-            text_format=to_generate,
+        response, model = route(
+            "exam",
+            lambda model: client.responses.parse(
+                model=model,
+                input=[
+                    {"role": "system", "content": system_prompt},
+                    {
+                        "role": "user",
+                        "content": f"Generate the {self.n} number of the questions",
+                    },
+                ],
+                text_format=to_generate,
+            ),
         )
         questions_answers = response.output_parsed.model_dump()
         return (
             questions_answers.get("questions_answers"),
             response.usage.input_tokens,
             response.usage.output_tokens,
+            model,
         )
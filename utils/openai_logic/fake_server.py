@@ -0,0 +1,228 @@
+"""
+Offline stand-in for the OpenAI Responses API (POST /v1/responses).
+
+Used by the `fake_openai` and `loadtest` management commands so the LLM-backed
+endpoints can be exercised without network access or API spend. Point the app
+at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio used to size the reported usage.
+CHARS_PER_TOKEN = 4
+# OpenAI only caches prompts of at least 1024 tokens, in 128 token increments.
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: int = 200
+    jitter_ms: int = 50
+    output_tokens: int = 150
+    input_tokens: int | None = None  # None = estimate from the request size
+    error_rate: float = 0.0
+    error_status: int = 429
+    stream_chunks: int = 10
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _schema_instance(schema: dict, defs: dict):
+    """Build the smallest value that satisfies a (pydantic generated) JSON schema."""
+    if "$ref" in schema:
+        return _schema_instance(defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        return _schema_instance(schema["anyOf"][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: _schema_instance(prop, defs)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        count = max(schema.get("minItems", 1), 1)
+        return [_schema_instance(schema.get("items", {}), defs) for _ in range(count)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    return "lorem ipsum"
+
+
+class FakeResponsesServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeConfig):
+        super().__init__(address, FakeResponsesHandler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.prefixes = {}  # prompt_cache_key -> serialized input of the last call
+        self.request_count = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def cached_tokens(self, cache_key: str | None, serialized_input: str) -> int:
+        """Simulate the upstream prefix cache for calls sharing a prompt_cache_key."""
+        if not cache_key:
+            return 0
+        with self.lock:
+            previous = self.prefixes.get(cache_key, "")
+            self.prefixes[cache_key] = serialized_input
+        shared = 0
+        for a, b in zip(previous, serialized_input):
+            if a != b:
+                break
+            shared += 1
+        tokens = shared // CHARS_PER_TOKEN
+        if tokens < CACHE_MIN_TOKENS:
+            return 0
+        return tokens - tokens % CACHE_BLOCK_TOKENS
+
+
+class FakeResponsesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("fake openai: " + format, *args)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/responses"):
+            return self._send_json(404, {"error": {"message": "Not found"}})
+
+        config = self.server.config
+        with self.server.lock:
+            self.server.request_count += 1
+
+        delay = config.latency_ms + random.uniform(-1, 1) * config.jitter_ms
+        time.sleep(max(delay, 0) / 1000)
+
+        if config.error_rate and random.random() < config.error_rate:
+            return self._send_json(
+                config.error_status,
+                {
+                    "error": {
+                        "message": "Injected error from fake OpenAI server",
+                        "type": "server_error",
+                        "code": None,
+                    }
+                },
+            )
+
+        response = self._build_response(body)
+        if body.get("stream"):
+            return self._stream(response)
+        return self._send_json(200, response)
+
+    def _build_response(self, body: dict) -> dict:
+        config = self.server.config
+        serialized_input = json.dumps(body.get("input"), sort_keys=True)
+        input_tokens = config.input_tokens or _estimate_tokens(serialized_input)
+        cached = min(
+            self.server.cached_tokens(body.get("prompt_cache_key"), serialized_input),
+            input_tokens,
+        )
+
+        text_format = (body.get("text") or {}).get("format") or {}
+        if text_format.get("type") == "json_schema":
+            schema = text_format.get("schema", {})
+            text = json.dumps(_schema_instance(schema, schema.get("$defs", {})))
+        else:
+            text = " ".join(["lorem"] * config.output_tokens)
+
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": body.get("model"),
+            "output": [
+                {
+                    "type": "message",
+                    "id": f"msg_{uuid.uuid4().hex}",
+                    "status": "completed",
+                    "role": "assistant",
+                    "content": [
+                        {"type": "output_text", "text": text, "annotations": []}
+                    ],
+                }
+            ],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": cached},
+                "output_tokens": config.output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + config.output_tokens,
+            },
+        }
+
+    def _stream(self, response: dict):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(event_type: str, payload: dict):
+            data = json.dumps({"type": event_type, **payload})
+            self.wfile.write(f"event: {event_type}\ndata: {data}\n\n".encode())
+            self.wfile.flush()
+
+        text = response["output"][0]["content"][0]["text"]
+        chunk_size = max(len(text) // max(self.server.config.stream_chunks, 1), 1)
+        send("response.created", {"response": {**response, "status": "in_progress"}})
+        for start in range(0, len(text), chunk_size):
+            send(
+                "response.output_text.delta",
+                {
+                    "item_id": response["output"][0]["id"],
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": text[start : start + chunk_size],
+                },
+            )
+        send("response.completed", {"response": response})
+        self.close_connection = True
+
+
+def start_fake_server(
+    config: FakeConfig | None = None, host: str = "127.0.0.1", port: int = 0
+):
+    """Start the stand-in in a daemon thread; returns the server (see .base_url)."""
+    server = FakeResponsesServer((host, port), config or FakeConfig())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
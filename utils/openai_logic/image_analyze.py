@@ -1,6 +1,7 @@
 import base64
 
 from utils.openai_logic.client_create import client
+from utils.openai_logic.model_router import route
 
 
 def convert_byte_image2base64(image_file_bytes):
@@ -9,26 +10,26 @@ def convert_byte_image2base64(image_file_bytes):
     return base64.b64encode(data).decode("utf-8")
 
 
-def image_analyze(image_file_bytes, model="gpt-4.1-mini"):
+def image_analyze(image_file_bytes, task="vision"):
     base64_image = convert_byte_image2base64(image_file_bytes)
-    res = client.responses.create(
-        model=model,
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "input_text",
-                        "text": "Analyze all details of this image, if it's photo of the document then transcribe it and if the diagram or anything than explain it.",
-                    },
-                    {
-                        "type": "input_image",
-                        "image_url": f"data:image/jpeg;base64,{base64_image}",
-                        "detail": "low",
-                    },
-                ],
-            }
-        ],
+    image_input = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "input_text",
+                    "text": "Analyze all details of this image, if it's photo of the document then transcribe it and if the diagram or anything than explain it.",
+                },
+                {
+                    "type": "input_image",
+                    "image_url": f"data:image/jpeg;base64,{base64_image}",
+                    "detail": "low",
+                },
+            ],
+        }
+    ]
+    res, model = route(
+        task, lambda model: client.responses.create(model=model, input=image_input)
     )
 
-    return res.output_text, res.usage.input_tokens, res.usage.output_tokens
+    return res.output_text, res.usage.input_tokens, res.usage.output_tokens, model
@@ -0,0 +1,64 @@
+import logging
+
+import openai
+from django.conf import settings
+
+from .token_calculation import pricing
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean "this model is overloaded / unreachable right now", so the
+# next model of the policy is tried. Anything else is raised to the caller.
+FALLBACK_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def models_for(task: str, tier: str = "Standard") -> list:
+    """
+    Return the candidate models for `task`, in order of preference.
+
+    Policies come from settings.OPENAI_MODEL_POLICIES, an ordered model list
+    per task (first = preferred, rest = fallbacks). Models without a price in
+    `tier` are skipped, so every routed call can be priced by token_calculation.
+    """
+    policies = settings.OPENAI_MODEL_POLICIES
+    if task not in policies:
+        raise ValueError(f"No model policy configured for task '{task}'.")
+
+    candidates = []
+    for model in policies[task]:
+        if model in candidates:
+            continue
+        if model not in pricing[tier]:
+            logger.warning(
+                "Skipping model %s for task %s: no %s pricing", model, task, tier
+            )
+            continue
+        candidates.append(model)
+
+    if not candidates:
+        raise ValueError(f"No priced model available for task '{task}'.")
+    return candidates
+
+
+def route(task: str, call):
+    """
+    Run `call(model)` with the models of the `task` policy until one succeeds.
+
+    Returns:
+        tuple: (result of call, model actually used)
+    """
+    last_error = None
+    for model in models_for(task):
+        try:
+            return call(model), model
+        except FALLBACK_ERRORS as e:
+            logger.warning(
+                "Model %s failed for task %s (%s), falling back", model, task, e
+            )
+            last_error = e
+    raise last_error
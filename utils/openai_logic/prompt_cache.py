@@ -0,0 +1,81 @@
+import threading
+from collections import defaultdict
+
+SYSTEM_PROMPT = "You are a Exam Preparation helpful assistant. You help students to prepare for their exams by providing them with relevant information and resources. You can also help them to create study plans and schedules. You are very friendly and always respond in a positive manner. You can provide the answer directly or MCQ questions if the user asks for it or on your own for their better clarity about the topics."
+
+
+# Keys kept in Channel.context for the frontend and bookkeeping, never sent to the model.
+OUTBOUND_DROP_KEYS = frozenset({"files", "document"})
+
+
+def project(conversation: list, drop: frozenset = OUTBOUND_DROP_KEYS):
+    """
+    Lazily yield the model-facing view of each stored message.
+
+    Messages without any `drop` key are yielded as-is; the others are yielded
+    as a new shallow dict without those keys. Content strings are shared with
+    the stored history, which is never copied or modified, so callers must
+    treat the yielded messages as read-only.
+    """
+    for message in conversation:
+        if drop.isdisjoint(message):
+            yield message
+        else:
+            yield {k: v for k, v in message.items() if k not in drop}
+
+
+def build_model_input(
+    conversation: list, query: str | None = None, context: list | None = None
+) -> list:
+    """
+    Model input for a stored conversation: its messages in stored order,
+    then the per-turn context, then the new query.
+
+    The history is append-only and starts with the static system prompt, so
+    each turn's input extends the previous one and OpenAI can serve all of
+    it from the prompt cache. Attachment messages stay where they were
+    uploaded: moving them ahead of the turns would change the prefix of
+    every earlier turn whenever a file is added mid-conversation. Messages
+    go through project(), so the stored conversation is neither copied nor
+    modified. `context` holds messages that change every turn (retrieved
+    document excerpts), so they go after the history.
+    """
+    model_input = list(project(conversation))
+    if context:
+        model_input.extend(context)
+    if query:
+        model_input.append({"role": "user", "content": query})
+    return model_input
+
+
+# --- Prompt cache hit rate per endpoint (process local) ---
+_lock = threading.Lock()
+_stats = defaultdict(lambda: {"requests": 0, "input_tokens": 0, "cached_tokens": 0})
+
+
+def record(endpoint: str, input_tokens: int, cached_tokens: int):
+    """Add one request's input/cached token counts to the endpoint totals."""
+    with _lock:
+        entry = _stats[endpoint]
+        entry["requests"] += 1
+        entry["input_tokens"] += input_tokens
+        entry["cached_tokens"] += cached_tokens
+
+
+def hit_rate(input_tokens: int, cached_tokens: int) -> float:
+    """Share of input tokens that were served from the prompt cache."""
+    if not input_tokens:
+        return 0.0
+    return round(cached_tokens / input_tokens, 4)
+
+
+def snapshot() -> dict:
+    """Return {endpoint: {requests, input_tokens, cached_tokens, hit_rate}}."""
+    with _lock:
+        return {
+            endpoint: {
+                **entry,
+                "hit_rate": hit_rate(entry["input_tokens"], entry["cached_tokens"]),
+            }
+            for endpoint, entry in _stats.items()
+        }
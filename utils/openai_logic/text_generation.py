@@ -1,13 +1,31 @@
 from utils.openai_logic.client_create import client
+from utils.openai_logic.model_router import route
+from utils.openai_logic.token_calculation import cached_tokens
 
 
-def text_generation(conversation: list, model="gpt-4.1-mini"):
-    res = client.responses.create(model=model, input=conversation)
+def text_generation(conversation: list, task="chat", cache_key=None):
+    """
+    Returns (text, input_tokens, output_tokens, model, cached_tokens).
 
-    return res.output_text, res.usage.input_tokens, res.usage.output_tokens
+    `cache_key` is sent as `prompt_cache_key` so turns of the same channel are
+    routed to the same upstream prompt cache.
+    """
+    extra = {"prompt_cache_key": cache_key} if cache_key else {}
+    res, model = route(
+        task,
+        lambda model: client.responses.create(model=model, input=conversation, **extra),
+    )
 
+    return (
+        res.output_text,
+        res.usage.input_tokens,
+        res.usage.output_tokens,
+        model,
+        cached_tokens(res.usage),
+    )
 
-def title_generation(user_input, model="gpt-4.1-mini"):
+
+def title_generation(user_input, task="title"):
     conversation = [
         {
             "role": "system",
@@ -19,6 +37,8 @@ def title_generation(user_input, model="gpt-4.1-mini"):
             "content": "As you have seen the user inputs above, so on the basis of the user input, generate the title of the conversation in just 3-4 words only.",
         },
     ]
-    res = client.responses.create(model=model, input=conversation)
+    res, model = route(
+        task, lambda model: client.responses.create(model=model, input=conversation)
+    )
 
-    return res.output_text, res.usage.input_tokens, res.usage.output_tokens
+    return res.output_text, res.usage.input_tokens, res.usage.output_tokens, model
@@ -1,9 +1,11 @@
 # --- Pricing per 1M tokens (USD) ---
+# "cached_input" is the discounted rate for prompt-cache hits; models without it
+# are billed at the regular input rate for cached tokens.
 pricing = {
     "Batch": {
-        "gpt-5": {"input": 0.625, "output": 5.00},
-        "gpt-5-mini": {"input": 0.125, "output": 1.00},
-        "gpt-5-nano": {"input": 0.025, "output": 0.20},
+        "gpt-5": {"input": 0.625, "cached_input": 0.0625, "output": 5.00},
+        "gpt-5-mini": {"input": 0.125, "cached_input": 0.0125, "output": 1.00},
+        "gpt-5-nano": {"input": 0.025, "cached_input": 0.0025, "output": 0.20},
         "gpt-5-pro": {"input": 7.50, "output": 60.00},
         "gpt-4.1": {"input": 1.00, "output": 4.00},
         "gpt-4.1-mini": {"input": 0.20, "output": 0.80},
@@ -14,41 +16,45 @@ pricing = {
         "o4-mini": {"input": 0.55, "output": 2.20},
     },
     "Flex": {
-        "gpt-5": {"input": 0.625, "output": 5.00},
-        "gpt-5-mini": {"input": 0.125, "output": 1.00},
-        "gpt-5-nano": {"input": 0.025, "output": 0.20},
-        "o3": {"input": 1.00, "output": 4.00},
-        "o4-mini": {"input": 0.55, "output": 2.20},
+        "gpt-5": {"input": 0.625, "cached_input": 0.0625, "output": 5.00},
+        "gpt-5-mini": {"input": 0.125, "cached_input": 0.0125, "output": 1.00},
+        "gpt-5-nano": {"input": 0.025, "cached_input": 0.0025, "output": 0.20},
+        "o3": {"input": 1.00, "cached_input": 0.25, "output": 4.00},
+        "o4-mini": {"input": 0.55, "cached_input": 0.138, "output": 2.20},
     },
     "Standard": {
-        "gpt-5": {"input": 1.25, "output": 10.00},
-        "gpt-5-mini": {"input": 0.25, "output": 2.00},
-        "gpt-5-nano": {"input": 0.05, "output": 0.40},
+        "gpt-5": {"input": 1.25, "cached_input": 0.125, "output": 10.00},
+        "gpt-5-mini": {"input": 0.25, "cached_input": 0.025, "output": 2.00},
+        "gpt-5-nano": {"input": 0.05, "cached_input": 0.005, "output": 0.40},
         "gpt-5-pro": {"input": 15.00, "output": 120.00},
-        "gpt-4.1": {"input": 2.00, "output": 8.00},
-        "gpt-4.1-mini": {"input": 0.40, "output": 1.60},
-        "gpt-4.1-nano": {"input": 0.10, "output": 0.40},
-        "gpt-4o": {"input": 2.50, "output": 10.00},
-        "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-        "o3": {"input": 2.00, "output": 8.00},
-        "o4-mini": {"input": 1.10, "output": 4.40},
+        "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+        "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+        "gpt-4.1-nano": {"input": 0.10, "cached_input": 0.025, "output": 0.40},
+        "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+        "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+        "o3": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+        "o4-mini": {"input": 1.10, "cached_input": 0.275, "output": 4.40},
     },
     "Priority": {
-        "gpt-5": {"input": 2.50, "output": 20.00},
-        "gpt-5-mini": {"input": 0.45, "output": 3.60},
-        "gpt-4.1": {"input": 3.50, "output": 14.00},
-        "gpt-4.1-mini": {"input": 0.70, "output": 2.80},
-        "gpt-4.1-nano": {"input": 0.20, "output": 0.80},
-        "gpt-4o": {"input": 4.25, "output": 17.00},
-        "gpt-4o-mini": {"input": 0.25, "output": 1.00},
-        "o3": {"input": 3.50, "output": 14.00},
-        "o4-mini": {"input": 2.00, "output": 8.00},
+        "gpt-5": {"input": 2.50, "cached_input": 0.25, "output": 20.00},
+        "gpt-5-mini": {"input": 0.45, "cached_input": 0.045, "output": 3.60},
+        "gpt-4.1": {"input": 3.50, "cached_input": 0.875, "output": 14.00},
+        "gpt-4.1-mini": {"input": 0.70, "cached_input": 0.175, "output": 2.80},
+        "gpt-4.1-nano": {"input": 0.20, "cached_input": 0.05, "output": 0.80},
+        "gpt-4o": {"input": 4.25, "cached_input": 2.125, "output": 17.00},
+        "gpt-4o-mini": {"input": 0.25, "cached_input": 0.125, "output": 1.00},
+        "o3": {"input": 3.50, "cached_input": 0.875, "output": 14.00},
+        "o4-mini": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
     },
 }
 
 
 def sum_input_output_token_cost(
-    model, input_tokens, output_tokens, tier: str = "Standard"
+    model,
+    input_tokens,
+    output_tokens,
+    tier: str = "Standard",
+    cached_input_tokens: int = 0,
 ):
     """
     Calculate the total USD cost for OpenAI API usage based on token counts and pricing tier.
@@ -58,6 +64,9 @@ def sum_input_output_token_cost(
         input_tokens (int): Number of input tokens used (from API usage)
         output_tokens (int): Number of output tokens used (from API usage)
         tier (str): 'Batch', 'Flex', 'Standard', or 'Priority' (default: 'Standard')
+        cached_input_tokens (int): Part of input_tokens served from the prompt
+            cache (usage.input_tokens_details.cached_tokens), billed at the
+            "cached_input" rate
 
     Returns:
         dict: Breakdown of input/output costs and total USD cost
@@ -75,12 +84,17 @@ def sum_input_output_token_cost(
 
     # --- Compute cost ---
     per_million = tier_pricing[model]
-    input_cost = (input_tokens / 1_000_000) * per_million["input"]
+    cached_input_tokens = min(cached_input_tokens, input_tokens)
+    cached_rate = per_million.get("cached_input", per_million["input"])
+    input_cost = ((input_tokens - cached_input_tokens) / 1_000_000) * per_million[
+        "input"
+    ] + (cached_input_tokens / 1_000_000) * cached_rate
     output_cost = (output_tokens / 1_000_000) * per_million["output"]
     total_cost = input_cost + output_cost
 
     return {
         "input_tokens": input_tokens,
+        "cached_input_tokens": cached_input_tokens,
         "output_tokens": output_tokens,
         "total_tokens": input_tokens + output_tokens,
         "input_cost_usd": round(input_cost, 6),
@@ -117,3 +131,40 @@ def update_token_cost(existing: dict, new: dict, precision: int = 6) -> dict:
             result[k] = round(result[k], precision)
 
     return result
+
+
+def add_model_usage(
+    existing: dict,
+    model,
+    input_tokens,
+    output_tokens,
+    tier: str = "Standard",
+    cached_input_tokens: int = 0,
+) -> dict:
+    """
+    Price one API call with the model that actually served it and merge the
+    result into an existing token cost record.
+
+    Parameters:
+        existing (dict): Token cost record accumulated so far (may be empty)
+        model (str): Model returned by model_router.route for this call
+        input_tokens (int): Number of input tokens used by the call
+        output_tokens (int): Number of output tokens used by the call
+        tier (str): Pricing tier (default: 'Standard')
+        cached_input_tokens (int): Cached part of input_tokens (default: 0)
+
+    Returns:
+        dict: Updated combined token cost summary
+    """
+    return update_token_cost(
+        existing,
+        sum_input_output_token_cost(
+            model, input_tokens, output_tokens, tier, cached_input_tokens
+        ),
+    )
+
+
+def cached_tokens(usage) -> int:
+    """Return usage.input_tokens_details.cached_tokens, or 0 when not reported."""
+    details = getattr(usage, "input_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
@@ -0,0 +1,194 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection, connections
+from django.db.models import F, Max
+
+from api.channel.models import SearchEntry
+
+# Roles worth searching; system messages hold prompts and extracted files
+SEARCH_ROLES = ("user", "assistant")
+SNIPPET_CHARS = 160
+# Full-text indexes are named per text search configuration
+FTS_INDEX_PREFIX = "search_entry_fts_"
+# Name used while the index was declared in SearchEntry.Meta
+LEGACY_FTS_INDEX = "search_entry_content_fts"
+
+
+def fts_index():
+    """The GIN index search() needs for the current SEARCH_CONFIG."""
+    config = settings.SEARCH_CONFIG
+    return GinIndex(
+        SearchVector("content", config=config),
+        name=FTS_INDEX_PREFIX + re.sub(r"\W", "_", config.lower()),
+    )
+
+
+def ensure_fts_index(using="default"):
+    """
+    Create the full-text index on PostgreSQL if it is missing, and drop the
+    ones left over from another SEARCH_CONFIG. Other databases have none.
+    Run after every migrate (apps.py), so it never enters migration state,
+    which would then differ between databases and configs.
+    Returns the names created and dropped.
+    """
+    db = connections[using]
+    if db.vendor != "postgresql":
+        return [], []
+    wanted = fts_index()
+    with db.cursor() as cursor:
+        existing = db.introspection.get_constraints(cursor, SearchEntry._meta.db_table)
+    stale = [
+        name
+        for name in existing
+        if (name.startswith(FTS_INDEX_PREFIX) or name == LEGACY_FTS_INDEX)
+        and name != wanted.name
+    ]
+    created = []
+    with db.schema_editor() as editor:
+        for name in stale:
+            editor.remove_index(SearchEntry, GinIndex(fields=["content"], name=name))
+        if wanted.name not in existing:
+            editor.add_index(SearchEntry, wanted)
+            created.append(wanted.name)
+    return created, stale
+
+
+def _text(value):
+    """Flatten an exam question (nested dicts/lists of strings) into one string."""
+    if isinstance(value, dict):
+        return " ".join(_text(v) for v in value.values())
+    if isinstance(value, list):
+        return " ".join(_text(v) for v in value)
+    return str(value)
+
+
+def sync_channel(channel):
+    """
+    Index the messages appended to a channel since its last sync. Only the
+    tail past the highest indexed position is inserted, so a chat turn costs
+    one aggregate and one bulk insert; a context that shrank is re-indexed.
+    """
+    entries = SearchEntry.objects.filter(channel=channel)
+    last = entries.aggregate(last=Max("position"))["last"]
+    if last is not None and last >= len(channel.context):
+        entries.delete()
+        last = None
+
+    new = []
+    if last is None:
+        new.append(
+            SearchEntry(
+                user_id=channel.user_id,
+                channel=channel,
+                position=-1,
+                role="title",
+                content=channel.title,
+            )
+        )
+        last = -1
+    for position, message in enumerate(channel.context[last + 1 :], start=last + 1):
+        if message.get("role") in SEARCH_ROLES and message.get("content"):
+            new.append(
+                SearchEntry(
+                    user_id=channel.user_id,
+                    channel=channel,
+                    position=position,
+                    role=message["role"],
+                    content=message["content"],
+                )
+            )
+    SearchEntry.objects.bulk_create(new)
+
+
+def index_exam(exam):
+    """Index every question of an exam (exams are never edited after creation)."""
+    SearchEntry.objects.filter(exam=exam).delete()
+    SearchEntry.objects.bulk_create(
+        [
+            SearchEntry(
+                user_id=exam.user_id,
+                exam=exam,
+                position=-1,
+                role="title",
+                content=f"{exam.exam} {exam.subject}",
+            ),
+            *(
+                SearchEntry(
+                    user_id=exam.user_id,
+                    exam=exam,
+                    position=position,
+                    role="question",
+                    content=_text(question),
+                )
+                for position, question in enumerate(exam.questions_answers)
+            ),
+        ]
+    )
+
+
+def snippet(content, query):
+    """Text around the first query term, for databases without ts_headline."""
+    lowered = content.lower()
+    hits = [lowered.find(term) for term in query.lower().split()]
+    start = min((hit for hit in hits if hit >= 0), default=0)
+    start = max(start - SNIPPET_CHARS // 4, 0)
+    text = content[start : start + SNIPPET_CHARS]
+    return (
+        ("..." if start else "")
+        + text
+        + ("..." if len(content) > start + SNIPPET_CHARS else "")
+    )
+
+
+def search(user, query):
+    """
+    Entries of `user` matching `query`, best first.
+
+    On PostgreSQL this is a websearch-syntax tsquery against the GIN index on
+    to_tsvector(SEARCH_CONFIG, content), ranked with ts_rank and annotated
+    with a ts_headline snippet (matches wrapped in **). Elsewhere it falls
+    back to a substring match ordered by recency; the serializer then builds
+    the snippet with snippet().
+    """
+    entries = SearchEntry.objects.filter(user=user).select_related("channel", "exam")
+    entries = entries.only(
+        "channel",
+        "exam",
+        "position",
+        "role",
+        "content",
+        "created_at",
+        "channel__title",
+        "exam__exam",
+        "exam__subject",
+    )
+    if connection.vendor != "postgresql":
+        return entries.filter(content__icontains=query).order_by("-created_at", "-id")
+
+    config = settings.SEARCH_CONFIG
+    tsquery = SearchQuery(query, config=config, search_type="websearch")
+    return (
+        entries.alias(document=SearchVector("content", config=config))
+        .filter(document=tsquery)
+        .annotate(
+            rank=SearchRank(F("document"), tsquery),
+            snippet=SearchHeadline(
+                "content",
+                tsquery,
+                config=config,
+                start_sel="**",
+                stop_sel="**",
+                max_words=30,
+                min_words=10,
+            ),
+        )
+        .order_by("-rank", "-created_at")
+    )
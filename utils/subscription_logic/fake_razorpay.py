@@ -0,0 +1,157 @@
+"""
+Offline stand-in for the parts of the Razorpay Orders API the app uses
+(create/fetch orders, list an order's payments).
+
+Used by the `fake_razorpay` management command so checkout can be exercised
+without network access or a Razorpay account. Point the app at it with
+RAZORPAY_BASE_URL=http://127.0.0.1:<port>. pay() simulates a customer paying
+an order and returns what the checkout widget would post to verify-payment.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+ORDER_PATH = re.compile(r"^/v1/orders/(?P<id>[\w-]+)(?P<payments>/payments)?/?$")
+
+
+@dataclass
+class FakeRazorpayConfig:
+    latency_ms: int = 150
+    key_secret: str = ""  # signs pay() results like the checkout widget
+
+
+class FakeRazorpayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeRazorpayConfig):
+        super().__init__(address, FakeRazorpayHandler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.orders = {}  # order id -> order entity
+        self.payments = {}  # order id -> [payment entity]
+        self.request_count = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def create_order(self, body: dict) -> dict:
+        order = {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": int(body.get("amount", 0)),
+            "amount_paid": 0,
+            "amount_due": int(body.get("amount", 0)),
+            "currency": body.get("currency", "INR"),
+            "receipt": body.get("receipt"),
+            "status": "created",
+            "attempts": 0,
+            "notes": body.get("notes") or [],
+            "created_at": int(time.time()),
+        }
+        with self.lock:
+            self.orders[order["id"]] = order
+            self.payments[order["id"]] = []
+        return order
+
+    def pay(self, order_id: str) -> dict:
+        """Capture a payment for the order; returns the verify-payment body."""
+        with self.lock:
+            order = self.orders[order_id]
+            payment = {
+                "id": f"pay_{uuid.uuid4().hex[:14]}",
+                "entity": "payment",
+                "amount": order["amount"],
+                "currency": order["currency"],
+                "status": "captured",
+                "order_id": order_id,
+                "captured": True,
+                "created_at": int(time.time()),
+            }
+            self.payments[order_id].append(payment)
+            order.update(status="paid", amount_paid=order["amount"], amount_due=0)
+        signature = hmac.new(
+            self.config.key_secret.encode(),
+            f"{order_id}|{payment['id']}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return {
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment["id"],
+            "razorpay_signature": signature,
+        }
+
+
+class FakeRazorpayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug("fake razorpay: " + format, *args)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self):
+        return self._send_json(
+            404,
+            {
+                "error": {
+                    "code": "BAD_REQUEST_ERROR",
+                    "description": "The id provided does not exist",
+                }
+            },
+        )
+
+    def _wait(self):
+        with self.server.lock:
+            self.server.request_count += 1
+        time.sleep(self.server.config.latency_ms / 1000)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self._wait()
+        if self.path.rstrip("/") != "/v1/orders":
+            return self._not_found()
+        return self._send_json(200, self.server.create_order(body))
+
+    def do_GET(self):
+        self._wait()
+        match = ORDER_PATH.match(self.path.split("?")[0])
+        if match is None or match["id"] not in self.server.orders:
+            return self._not_found()
+        with self.server.lock:
+            if match["payments"]:
+                items = list(self.server.payments[match["id"]])
+                payload = {"entity": "collection", "count": len(items), "items": items}
+            else:
+                payload = dict(self.server.orders[match["id"]])
+        return self._send_json(200, payload)
+
+
+def start_fake_razorpay(
+    config: FakeRazorpayConfig | None = None, host: str = "127.0.0.1", port: int = 0
+):
+    """Start the stand-in in a daemon thread; returns the server (see .base_url)."""
+    server = FakeRazorpayServer((host, port), config or FakeRazorpayConfig())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -1,10 +1,41 @@
 import logging
+from collections import Counter
 
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from api.subscriptions.models import Order
 from api.user.models import UserCredit
 
 logger = logging.getLogger(__name__)
 
 
+def credit_tokens(tokens_by_user):
+    """
+    Add tokens to several users' credits in one UPDATE: {user_id: tokens}.
+    Missing UserCredit rows are created first; the additions are done in
+    SQL, so concurrent token deductions are never overwritten.
+    """
+    if not tokens_by_user:
+        return
+    UserCredit.objects.bulk_create(
+        [UserCredit(user_id=user_id) for user_id in tokens_by_user],
+        ignore_conflicts=True,
+    )
+    added = Case(
+        *(
+            When(user_id=user_id, then=Value(tokens))
+            for user_id, tokens in tokens_by_user.items()
+        ),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    UserCredit.objects.filter(user_id__in=tokens_by_user).update(
+        total_tokens=F("total_tokens") + added,
+        remaining_tokens=F("remaining_tokens") + added,
+    )
+
+
 def activate_subscription(order):
     """
     Credit tokens to user after successful payment.
@@ -15,14 +46,61 @@ def activate_subscription(order):
         logger.warning("Order %s has no plan linked", order.id)
         return None
 
-    user_credit, _ = UserCredit.objects.get_or_create(user=order.user)
+    credit_tokens({order.user_id: plan.token_limit})
+    logger.info("Added %s tokens to user %s", plan.token_limit, order.user.email)
+    return plan.token_limit
 
-    user_credit.total_tokens += plan.token_limit
-    user_credit.remaining_tokens += plan.token_limit
-    user_credit.save()
 
-    logger.info("Added %s tokens to user %s", plan.token_limit, order.user.email)
-    return user_credit
+def mark_order_paid(razorpay_order_id, razorpay_payment_id):
+    """
+    Mark the order paid and credit its plan, exactly once however many
+    callbacks (verify-payment, webhook retries) race for it: only the caller
+    whose conditional UPDATE ... WHERE is_paid = false matches a row goes on
+    to credit, in the same transaction. Returns the order if this call paid
+    it, else None (already paid or unknown order).
+    """
+    with transaction.atomic():
+        updated = Order.objects.filter(
+            razorpay_order_id=razorpay_order_id, is_paid=False
+        ).update(is_paid=True, razorpay_payment_id=razorpay_payment_id)
+        if not updated:
+            return None
+        order = Order.objects.select_related("plan", "user").get(
+            razorpay_order_id=razorpay_order_id
+        )
+        activate_subscription(order)
+    return order
+
+
+def mark_orders_paid(payments):
+    """
+    Batch mark_order_paid() for reconciliation: {order pk: razorpay payment
+    id}. In one transaction, the orders still unpaid are locked, marked paid
+    with their payment ids and their plans credited, with one UPDATE for
+    the orders and one for the credits. Returns the orders this call paid.
+    """
+    with transaction.atomic():
+        orders = list(
+            # of=self: the plan join is an outer join, which PostgreSQL
+            # will not lock
+            Order.objects.select_for_update(of=("self",))
+            .filter(pk__in=payments, is_paid=False)
+            .select_related("plan")
+        )
+        if not orders:
+            return []
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(
+            is_paid=True,
+            razorpay_payment_id=Case(
+                *(When(pk=order.pk, then=Value(payments[order.pk])) for order in orders)
+            ),
+        )
+        tokens = Counter()
+        for order in orders:
+            if order.plan is not None:
+                tokens[order.user_id] += order.plan.token_limit
+        credit_tokens(tokens)
+    return orders
 
 
 def check_and_deduct_tokens(user, tokens_to_consume: int):
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import quote_etag
+
+from api.subscriptions.models import SubscriptionPlan
+from api.subscriptions.serializers import SubscriptionPlanSerializer
+from utils.cache_logic.shared_cache import shared_cache
+
+# Bumped on every plan change, so other processes drop their copy too (with
+# a shared cache; otherwise they reload after PLAN_CATALOG_TTL)
+VERSION_KEY = "plan-catalog-version"
+
+_lock = threading.Lock()
+_catalog = None
+
+
+class Catalog:
+    """The plans ordered by token_limit, their API data and its strong ETag."""
+
+    def __init__(self, plans, version):
+        self.plans = plans
+        self.by_id = {str(plan.id): plan for plan in plans}
+        self.data = SubscriptionPlanSerializer(plans, many=True).data
+        body = json.dumps(self.data, cls=DjangoJSONEncoder, sort_keys=True)
+        self.etag = quote_etag(hashlib.sha256(body.encode()).hexdigest()[:32])
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+
+def _stale(catalog, version):
+    return (
+        catalog is None
+        or catalog.version != version
+        or time.monotonic() - catalog.loaded_at > settings.PLAN_CATALOG_TTL
+    )
+
+
+def get_catalog():
+    """
+    The process-wide plan catalog, loaded on first use and reloaded once it
+    is PLAN_CATALOG_TTL seconds old or after a plan is saved or deleted: in
+    this process at once, and in the others on their next lookup when the
+    default cache is shared (they check a version kept there). With a
+    per-process cache other processes only see the change after the TTL.
+    """
+    global _catalog
+    cache = shared_cache()
+    version = cache.get(VERSION_KEY, 0) if cache is not None else 0
+    catalog = _catalog
+    if _stale(catalog, version):
+        with _lock:
+            catalog = _catalog
+            if _stale(catalog, version):
+                # Never from a replica: a lagging copy would be kept (and
+                # charged from) until the next reload
+                plans = list(
+                    SubscriptionPlan.objects.using("default").order_by("token_limit")
+                )
+                catalog = _catalog = Catalog(plans, version)
+    return catalog
+
+
+def get_plan(plan_id):
+    """The plan with this id, or None; no query once the catalog is loaded."""
+    return get_catalog().by_id.get(str(plan_id))
+
+
+def invalidate():
+    """Drop the catalog here and, through the shared version, everywhere."""
+    global _catalog
+    _catalog = None
+    cache = shared_cache()
+    if cache is None:
+        return
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # key missing or evicted
+        cache.set(VERSION_KEY, 1, None)
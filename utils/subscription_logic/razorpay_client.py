@@ -0,0 +1,67 @@
+import threading
+
+import razorpay
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_lock = threading.Lock()
+_client = None
+
+
+class _TimeoutSession(requests.Session):
+    """Session applying a default (connect, read) timeout to every call."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(*args, **kwargs)
+
+
+def build_session():
+    session = _TimeoutSession(
+        (settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT)
+    )
+    # Connection failures are retried for every method (nothing was sent);
+    # read errors and 5xx only for idempotent ones, so an order is never
+    # created twice
+    retry = Retry(
+        total=settings.RAZORPAY_MAX_RETRIES,
+        connect=settings.RAZORPAY_MAX_RETRIES,
+        read=settings.RAZORPAY_MAX_RETRIES,
+        status=settings.RAZORPAY_MAX_RETRIES,
+        status_forcelist=(500, 502, 503, 504),
+        backoff_factor=0.2,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=settings.RAZORPAY_POOL_SIZE, max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_client():
+    """
+    The process-wide razorpay.Client. Its session keeps TLS connections to
+    the API open between checkouts; RAZORPAY_BASE_URL points it elsewhere,
+    e.g. at the offline stand-in (manage.py fake_razorpay).
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                options = {}
+                if settings.RAZORPAY_BASE_URL:
+                    options["base_url"] = settings.RAZORPAY_BASE_URL
+                _client = razorpay.Client(
+                    session=build_session(),
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                    **options,
+                )
+    return _client
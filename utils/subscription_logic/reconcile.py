@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from razorpay.errors import BadRequestError, GatewayError, ServerError
+from requests import RequestException
+
+from .main import mark_orders_paid
+from .razorpay_client import get_client
+
+
+def _gateway_status(order):
+    """
+    (kind, detail) for one unpaid order as Razorpay sees it:
+    ("paid", payment), ("unpaid", None), ("missing", message) or
+    ("error", message).
+    """
+    try:
+        payments = get_client().order.payments(order.razorpay_order_id)
+    except BadRequestError as e:  # unknown order id
+        return "missing", str(e)
+    except (GatewayError, ServerError, RequestException, ValueError) as e:
+        return "error", str(e)
+    captured = [p for p in payments.get("items", []) if p.get("status") == "captured"]
+    if not captured:
+        return "unpaid", None
+    return "paid", captured[0]
+
+
+def reconcile_batch(orders, workers, dry_run=False):
+    """
+    Check a batch of unpaid orders against Razorpay (`workers` requests in
+    flight over the shared client) and mark the paid ones paid and credited
+    in one transaction. Returns (paid orders, [(order, kind, detail)])
+    where kind is "paid", "amount", "missing" or "error".
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        statuses = list(pool.map(_gateway_status, orders))
+
+    payments, report = {}, []
+    for order, (kind, detail) in zip(orders, statuses):
+        if kind == "unpaid":
+            continue
+        if kind != "paid":
+            report.append((order, kind, detail))
+            continue
+        expected = int(order.amount * 100)  # as sent by CreateOrderView
+        if detail.get("amount") != expected:
+            # Never credit a plan for a different amount; left for a human
+            report.append(
+                (
+                    order,
+                    "amount",
+                    f"captured {detail.get('amount')}, expected {expected}",
+                )
+            )
+            continue
+        payments[order.pk] = detail["id"]
+        report.append((order, "paid", detail["id"]))
+
+    if dry_run or not payments:
+        return [], report
+    return mark_orders_paid(payments), report
@@ -0,0 +1,112 @@
+import hashlib
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from api.subscriptions.models import WebhookEvent
+
+from .main import mark_order_paid
+
+logger = logging.getLogger(__name__)
+
+# Events that mean "this order's money is in"; both carry the payment entity
+PAYMENT_EVENTS = ("payment.captured", "order.paid")
+MAX_ATTEMPTS = 5
+
+
+def verify_signature(body: bytes, signature, secret):
+    """HMAC-SHA256 of the raw body, as sent in X-Razorpay-Signature."""
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def record(body: bytes, event_id=None):
+    """
+    Store a verified delivery in the inbox: one INSERT that is a no-op for a
+    retried event id. Deliveries without X-Razorpay-Event-Id are keyed by
+    the hash of their body, so an identical retry still collapses.
+    Returns the parsed event.
+    """
+    event = json.loads(body)
+    WebhookEvent.objects.bulk_create(
+        [
+            WebhookEvent(
+                event_id=event_id or hashlib.sha256(body).hexdigest()[:64],
+                event=event.get("event", ""),
+                payload=event,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    return event
+
+
+def apply(event):
+    """Act on one webhook event; anything but a payment is only recorded."""
+    if event.event not in PAYMENT_EVENTS:
+        return
+    payment = event.payload["payload"]["payment"]["entity"]
+    order = mark_order_paid(payment.get("order_id"), payment.get("id"))
+    if order is not None:
+        logger.info("Order %s paid via webhook %s", order.id, event.event_id)
+
+
+def process_pending(batch_size):
+    """
+    Apply up to `batch_size` pending events, oldest first, and return how
+    many were handled. Rows are claimed with SKIP LOCKED, so workers never
+    process the same event twice; each event runs in its own savepoint, and
+    a failing one is retried on later runs up to MAX_ATTEMPTS.
+    """
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookEvent.PENDING)
+            .order_by("received_at")[:batch_size]
+        )
+        for event in events:
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    apply(event)
+            except Exception as e:
+                logger.exception("Webhook %s failed", event.event_id)
+                event.last_error = str(e)[:2000]
+                if event.attempts >= MAX_ATTEMPTS:
+                    event.status = WebhookEvent.FAILED
+                continue
+            event.status = WebhookEvent.PROCESSED
+            event.processed_at = timezone.now()
+            event.last_error = ""
+        WebhookEvent.objects.bulk_update(
+            events, ["status", "attempts", "last_error", "processed_at"]
+        )
+    return len(events)
+
+
+def inbox_snapshot():
+    """
+    The state of the inbox: events waiting for the worker, the age of the
+    oldest one, and failed events. `stalled` is set once the oldest pending
+    event is older than RAZORPAY_WEBHOOK_MAX_LAG_SECONDS, which usually means
+    no process_razorpay_webhooks worker is running and payments go uncredited.
+    """
+    stats = WebhookEvent.objects.filter(
+        status__in=[WebhookEvent.PENDING, WebhookEvent.FAILED]
+    ).aggregate(
+        pending=Count("id", filter=Q(status=WebhookEvent.PENDING)),
+        failed=Count("id", filter=Q(status=WebhookEvent.FAILED)),
+        oldest=Min("received_at", filter=Q(status=WebhookEvent.PENDING)),
+    )
+    oldest = stats.pop("oldest")
+    age = (timezone.now() - oldest).total_seconds() if oldest else 0
+    stats["oldest_pending_age_seconds"] = round(age, 1)
+    stats["stalled"] = age > settings.RAZORPAY_WEBHOOK_MAX_LAG_SECONDS
+    return stats